@@ -0,0 +1,28 @@
+"""
+Reading of devconfig arguments from @fileName arguments and stdin.
+
+Only imports the standard library, so that the daemon client can expand the
+argument files it has to read on the daemon's behalf without loading pandas.
+"""
+from sys import stdin
+
+def isArgFile(arg):
+	"""Checks if the argument names an argument file, '-' being stdin."""
+	return arg == "-" or (arg.startswith("@") and len(arg) > 1)
+
+def iterArgLines(arg):
+	"""
+	Yields the whitespace separated arguments of the file named by an 
+	@fileName argument, or of stdin for '-', skipping # comments.
+	"""
+	if arg == "-":
+		argFile = stdin
+	else:
+		argFile = open(arg[1:])
+	try:
+		for line in argFile:
+			for lineArg in line.split("#", 1)[0].split():
+				yield lineArg
+	finally:
+		if argFile is not stdin:
+			argFile.close()
@@ -0,0 +1,43 @@
+"""
+Thread pools for running devconfig calls without blocking the caller.
+
+The non-blocking API hands back concurrent.futures Futures (the 'futures'
+backport on python 2) run by a bounded pool of worker threads. They can be
+waited on directly, hooked into with add_done_callback, or wrapped for an
+event loop (e.g. asyncio.wrap_future, or tornado, which yields them as is).
+
+Calls and the pmgr loads they fan out to run in separate pools, so a call
+waiting on its loads can never starve the pool the loads need. The futures
+package is only imported once a pool is needed, so devconfig still imports and
+runs its blocking commands where it is not installed.
+"""
+from threading import Lock
+
+maxCallWorkers = 4                    #Threads running the submitted calls
+maxLoadWorkers = 8                    #Threads loading pmgr handles for calls
+
+_pools    = {}                        #Dict of pool name:ThreadPoolExecutor
+_poolLock = Lock()
+
+def _getPool(name, maxWorkers):
+	"""Returns the named pool, creating it on first use."""
+	with _poolLock:
+		if name not in _pools:
+			from concurrent.futures import ThreadPoolExecutor
+			_pools[name] = ThreadPoolExecutor(maxWorkers)
+		return _pools[name]
+
+def submit(fn, *args, **kwargs):
+	"""Runs fn(*args, **kwargs) in the calls pool and returns its Future."""
+	return _getPool("calls", maxCallWorkers).submit(fn, *args, **kwargs)
+
+def submitLoad(fn, *args, **kwargs):
+	"""Runs fn(*args, **kwargs) in the loads pool and returns its Future."""
+	return _getPool("loads", maxLoadWorkers).submit(fn, *args, **kwargs)
+
+def gather(futures, timeout=None):
+	"""
+	Waits for all the futures and returns a list of their results, raising
+	concurrent.futures.TimeoutError if they are not done within timeout.
+	"""
+	return [future.result(timeout) for future in futures]
@@ -0,0 +1,140 @@
+#!/usr/bin/python
+"""
+Benchmarks for devconfig run against the in-process fake CA and pmgr backends.
+
+Times diff, view, summary view, apply, diffs sent to a resident daemon,
+pmgr table syncs, metadata load and PV argument parsing for a range of device
+counts and reports p50/p99 latency and throughput. Also checks that importing
+devconfig and running --help stays within the startup budget, which
+startupCheck.py checks on its own.
+
+Usage: python benchmarks.py [--sizes 1,10,100,1000] [--repeat 5]
+                            [--latency 0.0] [--disconnect 0.0] [--budget 1.0]
+"""
+import os
+import sys
+import time
+from tempfile import mkdtemp
+from threading import Thread
+from optparse import OptionParser
+
+from devconfig import devconfig, parsePvArguments
+from fakeBackends import fakeCABackend, fakePmgrFactory, devicePvs
+from daemon import dcfgServer, request
+from startupCheck import startupTime
+
+def percentile(times, pct):
+	"""Returns the nearest-rank percentile of the list of times."""
+	times = sorted(times)
+	idx   = int(round(pct / 100.0 * (len(times) - 1)))
+	return times[idx]
+
+def timeRuns(fn, repeat):
+	"""Calls fn repeat times and returns the list of wall times."""
+	times = []
+	for _ in range(repeat):
+		start = time.time()
+		fn()
+		times.append(time.time() - start)
+	return times
+
+def report(name, nDevices, times):
+	"""Prints one line of results."""
+	p50 = percentile(times, 50)
+	print "{0:<16} {1:>7} {2:>5} {3:>10.2f} {4:>10.2f} {5:>12.1f}".format(
+		name, nDevices, len(times), p50 * 1e3, percentile(times, 99) * 1e3,
+		nDevices / p50 if p50 else float('inf'))
+
+def daemonRuns(dCfg, Pvs, repeat):
+	"""
+	Serves dCfg on a temporary socket and returns the wall times of sending
+	it diff requests for the PVs, after one request to warm it up.
+	"""
+	socketPath = os.path.join(mkdtemp(), "devconfig.sock")
+	server = dcfgServer(dCfg, socketPath)
+	thread = Thread(target=server.serve_forever)
+	thread.daemon = True
+	thread.start()
+	try:
+		request("diff", Pvs, {"pmgr":True}, socketPath)
+		return timeRuns(lambda: request("diff", Pvs, {"pmgr":True}, 
+		                                socketPath), repeat)
+	finally:
+		server.shutdown()
+		server.server_close()
+		os.remove(socketPath)
+		os.rmdir(os.path.dirname(socketPath))
+
+def syncRuns(dCfg, repeat):
+	"""
+	Returns the wall times of syncing the pmgr tables, indexes included,
+	after one cfg has been changed in the pmgr each time.
+	"""
+	dCfg.warm()
+	pmgr = dCfg._getPmgr('ims_motor', 'xpp')
+	def sync():
+		pmgr.remoteChange("cfg", 1, {"name":"cfg {0}".format(time.time())})
+		dCfg._pmgrPool.sync('ims_motor', 'xpp')
+		dCfg._getObjIndex('ims_motor', 'xpp')
+		dCfg.warm()
+	return timeRuns(sync, repeat)
+
+def main():
+	parser = OptionParser()
+	parser.add_option('--sizes', action='store', type='string', dest='sizes',
+	                  default='1,10,100,1000')
+	parser.add_option('--repeat', action='store', type='int', dest='repeat',
+	                  default=5)
+	parser.add_option('--latency', action='store', type='float',
+	                  dest='latency', default=0.0)
+	parser.add_option('--disconnect', action='store', type='float',
+	                  dest='disconnect', default=0.0)
+	parser.add_option('--diffrate', action='store', type='float',
+	                  dest='diffRate', default=0.05)
+	parser.add_option('--budget', action='store', type='float', dest='budget',
+	                  default=1.0)
+	options, _ = parser.parse_args()
+	sizes  = [int(size) for size in options.sizes.split(',')]
+	repeat = options.repeat
+	fldMap = devconfig(mode='local')._objTypeFldMaps['ims_motor']
+	devnull = open(os.devnull, 'w')
+
+	print "{0:<16} {1:>7} {2:>5} {3:>10} {4:>10} {5:>12}".format(
+		"benchmark", "devices", "runs", "p50 (ms)", "p99 (ms)", "devices/s")
+	report("metadata cold", 1, timeRuns(
+		lambda: devconfig(mode='local', metaCache=False), repeat))
+	report("metadata cached", 1, timeRuns(
+		lambda: devconfig(mode='local'), repeat))
+
+	for nDevices in sizes:
+		Pvs = devicePvs('xpp', nDevices)
+		def newDcfg():
+			return devconfig(mode='local', caTimeout=0.1,
+			                 caBackend=fakeCABackend(
+				                 latency=options.latency,
+				                 disconnectRate=options.disconnect,
+				                 fldMap=fldMap),
+			                 pmgrFactory=fakePmgrFactory(
+				                 fldMap, nDevices, diffRate=options.diffRate))
+		report("pv parsing", nDevices, timeRuns(
+			lambda: parsePvArguments(Pvs), repeat))
+		report("diff", nDevices, timeRuns(
+			lambda: newDcfg().Diff(*Pvs, pmgr=True, out=devnull), repeat))
+		report("view", nDevices, timeRuns(
+			lambda: newDcfg().view(*Pvs, out=devnull), repeat))
+		report("summary view", nDevices, timeRuns(
+			lambda: newDcfg().view(*Pvs, summary=True, out=devnull), repeat))
+		report("apply", nDevices, timeRuns(
+			lambda: newDcfg().apply(*Pvs, out=devnull), repeat))
+		report("daemon diff", nDevices, daemonRuns(newDcfg(), Pvs, repeat))
+		report("pmgr sync", nDevices, syncRuns(newDcfg(), repeat))
+
+	importTime = startupTime(['-c', 'import devconfig'])
+	helpTime   = startupTime(['devconfig.py', '--help'])
+	passed     = importTime + helpTime <= options.budget
+	print "\nimport {0:.3f} s + --help {1:.3f} s, budget {2:.3f} s: {3}".format(
+		importTime, helpTime, options.budget, "PASS" if passed else "FAIL")
+	return 0 if passed else 1
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,446 @@
+"""
+Batched Channel Access reads and writes for devconfig.
+
+Rather than calling get() once per field, every channel needed for a group of
+devices is created up front and the whole group is then waited on against a
+single deadline. The time taken to read many devices is therefore bounded by
+the slowest IOC instead of the sum of all the individual reads. Writes work
+the same way: the channels are connected together and the puts are queued and
+flushed in one go. Devices and IOCs that fail to connect can be remembered in a
+NegativeCache so that later reads of them fail fast instead of waiting out the
+timeout again.
+"""
+import time
+from threading import Lock, local
+from collections import OrderedDict
+
+class pspBackend(object):
+	"""
+	Channel Access backend built on psp.Pv. The readers only use the methods
+	below, so any object providing them (and an 'error' exception type) can be
+	used in its place, e.g. a local fake for testing.
+	"""
+	def __init__(self):
+		from psp.Pv import Pv
+		from pyca import pyexc, flush_io, attach_context
+		self._Pv      = Pv
+		self._flushIO = flush_io
+		self._attach  = attach_context
+		self._threads = local()
+		self.error    = pyexc
+
+	def _attachThread(self):
+		"""Attaches the calling thread to the CA context the first time."""
+		if not getattr(self._threads, "attached", False):
+			self._attach()
+			self._threads.attached = True
+
+	def create(self, name):
+		"""
+		Starts connecting to the channel without blocking. The initial read is
+		issued by the connection handler as soon as the channel connects.
+		"""
+		self._attachThread()
+		chan = self._Pv(name, initialize=True)
+		chan.connect(timeout=None)
+		return chan
+
+	def flush(self):
+		"""Sends all the queued channel requests."""
+		self._flushIO()
+
+	def wait(self, chan, timeout):
+		"""
+		Waits up to timeout seconds for the channel to connect and return its
+		initial value. Returns True if the value is available.
+		"""
+		try:
+			chan.wait_ready(timeout)
+		except self.error:
+			return False
+		return bool(chan.isinitialized)
+
+	def value(self, chan):
+		"""Returns the last value read from the channel."""
+		return chan.value
+
+	def host(self, chan):
+		"""Returns the host:port of the IOC serving the channel, or None."""
+		try:
+			return chan.host()
+		except (AttributeError, self.error):
+			return None
+
+	def put(self, chan, value):
+		"""Queues a write of value to the channel. Sent on the next flush."""
+		chan.put(value, timeout=None)
+
+	def subscribe(self, name, callback):
+		"""
+		Starts a monitor on the channel, calling callback(name, value) every
+		time the channel value changes, and callback(name, None) when the
+		monitor fails or the channel disconnects. Returns the channel.
+		"""
+		self._attachThread()
+		chan = self._Pv(name, initialize=True, monitor=True)
+		def monitorCallback(e=None):
+			callback(name, chan.value if e is None else None)
+		def connectionCallback(isConnected):
+			if not isConnected:
+				callback(name, None)
+		chan.add_monitor_callback(monitorCallback)
+		chan.add_connection_callback(connectionCallback)
+		chan.connect(timeout=None)
+		return chan
+
+	def close(self, chan):
+		"""Disconnects the channel."""
+		try:
+			chan.disconnect()
+		except self.error:
+			pass
+
+class BatchReader(object):
+	"""
+	Reads many channels at once. The backend is only created on first use so
+	that nothing CA related is loaded until a live read is actually needed.
+	"""
+	def __init__(self, backend=None, timeout=1.0, negCache=None):
+		self._backend = backend
+		self.timeout  = timeout
+		self.negCache = negCache      #NegativeCache of unreachable devices
+
+	@property
+	def backend(self):
+		"""Returns the CA backend, creating the default one if needed."""
+		if self._backend is None:
+			self._backend = pspBackend()
+		return self._backend
+
+	def read(self, names, timeout=None, devices=None):
+		"""
+		Returns a dictionary of channel name to value for all the inputted
+		channel names. Channels that could not be connected to or read before
+		the shared deadline are set to None. devices optionally maps channel
+		names to their device (base PV): channels of devices in the negative
+		cache are not read at all, and once one channel of a device fails the
+		rest of the device's channels only get a last poll instead of waiting.
+		Devices none of whose channels answered go in the negative cache.
+		"""
+		backend = self.backend
+		if timeout is None:
+			timeout = self.timeout
+		negCache = self.negCache if devices else None
+		names  = list(unique(names))
+		values = {}
+		if negCache is not None:
+			dead = set(device for device in set(devices[name] for name in 
+			                                    names) if negCache.isDead(device))
+			values = dict.fromkeys((name for name in names if devices[name] in
+			                        dead), None)
+			negCache.skipped += len(values)
+			names = [name for name in names if name not in values]
+		chans = {}
+		for name in names:
+			try:
+				chans[name] = backend.create(name)
+			except backend.error:
+				chans[name] = None
+		backend.flush()
+		deadline = time.time() + timeout
+		answered = {}                 #Dict of device:connected chan
+		failed   = set()
+		try:
+			for name in names:
+				chan   = chans[name]
+				device = devices.get(name) if devices else None
+				if device is not None and device in failed:
+					remaining = 0
+				else:
+					remaining = max(deadline - time.time(), 1e-3)
+				if chan is not None and backend.wait(chan, remaining):
+					values[name] = backend.value(chan)
+					answered.setdefault(device, chan)
+				else:
+					values[name] = None
+					failed.add(device)
+			if negCache is not None:
+				self._updateNegCache(answered, failed)
+		finally:
+			for chan in chans.values():
+				if chan is not None:
+					backend.close(chan)
+		return values
+
+	def _updateNegCache(self, answered, failed):
+		"""
+		Marks the devices where no channel answered as dead and the others as
+		alive, along with the host of their IOC if the backend knows it.
+		"""
+		host = getattr(self.backend, "host", None)
+		for device, chan in answered.iteritems():
+			self.negCache.markAlive(device, host(chan) if host else None)
+		for device in failed.difference(answered):
+			self.negCache.markDead(device)
+
+class BatchWriter(object):
+	"""
+	Writes many channels at once. Like BatchReader the backend is only created
+	on first use.
+	"""
+	def __init__(self, backend=None, timeout=1.0):
+		self._backend = backend
+		self.timeout  = timeout
+
+	@property
+	def backend(self):
+		"""Returns the CA backend, creating the default one if needed."""
+		if self._backend is None:
+			self._backend = pspBackend()
+		return self._backend
+
+	def write(self, items, timeout=None):
+		"""
+		Puts the values of the inputted list of (channel name, value) pairs in
+		order and returns a dictionary of channel name to True if every put to
+		the channel was sent. Channels that could not be connected to before 
+		the shared deadline are set to False and nothing is written to them.
+		CA handles the requests sent to an IOC in order, so separate calls to
+		write reach the device in the order they were made.
+		"""
+		backend = self.backend
+		if timeout is None:
+			timeout = self.timeout
+		names = list(unique(name for name, _ in items))
+		chans = {}
+		for name in names:
+			try:
+				chans[name] = backend.create(name)
+			except backend.error:
+				chans[name] = None
+		backend.flush()
+		deadline = time.time() + timeout
+		written  = {}
+		try:
+			for name in names:
+				chan = chans[name]
+				remaining = max(deadline - time.time(), 1e-3)
+				written[name] = chan is not None and backend.wait(chan, remaining)
+			for name, value in items:
+				if not written[name]:
+					continue
+				try:
+					backend.put(chans[name], value)
+				except backend.error:
+					written[name] = False
+			backend.flush()
+		finally:
+			for chan in chans.values():
+				if chan is not None:
+					backend.close(chan)
+		return written
+
+class MonitorCache(object):
+	"""
+	Live value cache fed by CA monitors. Channels are read through the wrapped
+	BatchReader the first time they are requested and then subscribed to, so
+	repeat reads are served from memory. At most maxChannels subscriptions are
+	kept, evicting the least recently used ones, and entries older than maxAge
+	seconds (never if None) are read again. Channels that could not be 
+	subscribed to are not cached, and entries whose channel disconnects are
+	read again.
+	"""
+	def __init__(self, reader, maxChannels=5000, maxAge=60.0):
+		self._reader     = reader
+		self._entries    = OrderedDict()   #Dict of name:[chan,value,stamp]
+		self._lock       = Lock()
+		self.maxChannels = maxChannels     #Max number of subscriptions
+		self.maxAge      = maxAge          #Seconds before a value is reread
+		self.hits        = 0
+		self.misses      = 0
+		self.evictions   = 0
+
+	@property
+	def backend(self):
+		return self._reader.backend
+
+	def read(self, names, timeout=None, devices=None):
+		"""
+		Returns a dictionary of channel name to value like BatchReader.read,
+		only reading the channels that are not already cached and fresh.
+		"""
+		names  = list(unique(names))
+		values = {}
+		stale  = []
+		now    = time.time()
+		with self._lock:
+			for name in names:
+				entry = self._entries.pop(name, None)
+				if entry is None or not self._isFresh(entry, now):
+					stale.append(name)
+					if entry is not None:
+						self._entries[name] = entry
+					continue
+				self._entries[name] = entry   #Reinsert as most recently used
+				values[name] = entry[1]
+			self.hits   += len(names) - len(stale)
+			self.misses += len(stale)
+		if stale:
+			read = self._reader.read(stale, timeout, devices)
+			values.update(read)
+			self._subscribe([name for name in stale if read[name] is not None],
+			                read)
+		return values
+
+	def stats(self):
+		"""Returns a dictionary of the cache counters."""
+		with self._lock:
+			return {"hits"      : self.hits,
+			        "misses"    : self.misses,
+			        "evictions" : self.evictions,
+			        "channels"  : len(self._entries)}
+
+	def discard(self, names):
+		"""
+		Drops the entries of the inputted channels so they are read again, 
+		e.g. after they have been written to.
+		"""
+		with self._lock:
+			entries = [self._entries.pop(name, None) for name in names]
+		for entry in entries:
+			if entry is not None and entry[0] is not None:
+				self.backend.close(entry[0])
+
+	def clear(self):
+		"""Drops every entry and closes all the subscriptions."""
+		with self._lock:
+			entries, self._entries = self._entries, OrderedDict()
+		for entry in entries.values():
+			if entry[0] is not None:
+				self.backend.close(entry[0])
+
+	def _isFresh(self, entry, now):
+		"""Returns True if the entry holds a value that can be used."""
+		if entry[1] is None:
+			return False
+		return self.maxAge is None or now - entry[2] <= self.maxAge
+
+	def _subscribe(self, names, values):
+		"""Subscribes to the inputted channels, evicting old ones if needed."""
+		backend = self.backend
+		evicted = []
+		now     = time.time()
+		for name in names:
+			with self._lock:
+				entry = self._entries.pop(name, None)
+				if entry is None:
+					entry = [None, values[name], now]
+				else:
+					entry[1:] = [values[name], now]
+				self._entries[name] = entry
+			if entry[0] is None:
+				try:
+					entry[0] = backend.subscribe(name, self._update)
+				except backend.error:
+					# Without a monitor the value would never be updated
+					with self._lock:
+						if self._entries.get(name) is entry:
+							del self._entries[name]
+		with self._lock:
+			while len(self._entries) > self.maxChannels:
+				_, entry = self._entries.popitem(last=False)
+				evicted.append(entry)
+			self.evictions += len(evicted)
+		for entry in evicted:
+			if entry[0] is not None:
+				backend.close(entry[0])
+
+	def _update(self, name, value):
+		"""
+		Monitor callback that stores the new value of the channel. A value of
+		None (the channel disconnected) makes the entry stale until the 
+		monitor delivers a value again.
+		"""
+		with self._lock:
+			entry = self._entries.get(name)
+			if entry is not None:
+				entry[1:] = [value, time.time()]
+
+class NegativeCache(object):
+	"""
+	Remembers the devices, and the IOCs serving them, that failed to connect
+	so that reads of them fail fast. Entries expire maxAge seconds after the
+	last failure. IOCs are learnt from the hosts of the devices that did 
+	connect: once a device fails, every device known to be on its IOC is
+	treated as unreachable too.
+	"""
+	def __init__(self, maxAge=30.0):
+		self.maxAge   = maxAge        #Seconds before a dead entry expires
+		self._dead    = {}            #Dict of (kind,key):[expiry,failures]
+		self._hosts   = {}            #Dict of device:IOC host
+		self._lock    = Lock()
+		self.skipped  = 0             #Channel reads skipped
+
+	def isDead(self, device):
+		"""Returns True if the device or its IOC failed recently."""
+		now = time.time()
+		with self._lock:
+			keys = [("device", device)]
+			if device in self._hosts:
+				keys.append(("ioc", self._hosts[device]))
+			for key in keys:
+				entry = self._dead.get(key)
+				if entry is not None:
+					if entry[0] > now:
+						return True
+					del self._dead[key]
+		return False
+
+	def markDead(self, device):
+		"""Records a connection failure of the device and of its IOC."""
+		expiry = time.time() + self.maxAge
+		with self._lock:
+			keys = [("device", device)]
+			if device in self._hosts:
+				keys.append(("ioc", self._hosts[device]))
+			for key in keys:
+				entry = self._dead.setdefault(key, [expiry, 0])
+				entry[0]  = expiry
+				entry[1] += 1
+
+	def markAlive(self, device, host=None):
+		"""Clears the device (and its IOC) and records the IOC it is on."""
+		with self._lock:
+			self._dead.pop(("device", device), None)
+			if host is not None:
+				self._hosts[device] = host
+				self._dead.pop(("ioc", host), None)
+
+	def host(self, device):
+		"""Returns the IOC host the device was last seen on, or None."""
+		with self._lock:
+			return self._hosts.get(device)
+
+	def entries(self):
+		"""
+		Returns a list of (kind, key, seconds left, failures) for every entry
+		that has not expired, kind being 'device' or 'ioc'.
+		"""
+		now = time.time()
+		with self._lock:
+			return sorted((kind, key, expiry - now, failures) for (kind, key), 
+			              (expiry, failures) in self._dead.items() if 
+			              expiry > now)
+
+	def clear(self):
+		"""Drops every entry."""
+		with self._lock:
+			self._dead = {}
+
+def unique(seq):
+	"""Yields the items of seq in order, skipping ones already seen."""
+	seen = set()
+	for item in seq:
+		if item not in seen:
+			seen.add(item)
+			yield item
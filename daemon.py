@@ -0,0 +1,266 @@
+#!/usr/bin/python
+"""
+Resident devconfig daemon and its thin client.
+
+'devconfig.py serve' keeps one devconfig instance alive, with its metadata,
+pooled pmgr tables, search index and live caches warm, and answers requests
+sent over a local UNIX socket. Running this module is the client: it only
+imports the standard library and argFiles, so a diff, view or search sent to a
+warm daemon returns in tens of milliseconds instead of paying for pandas, the
+CA libraries and the metadata on every call.
+
+Each request is a single line of JSON, {"command", "args", "kwargs"}, and the
+reply is a single line of JSON, {"ok", "output", "error", "seconds"}.
+
+Usage: python daemon.py [--socket PATH] diff|view|search|stats|ping|refresh
+                        [args] [devconfig options]
+"""
+import os
+import sys
+import json
+import stat
+import time
+import socket
+from optparse import OptionParser
+from StringIO import StringIO
+from argFiles import isArgFile, iterArgLines
+
+daemonCommands = ("diff", "view", "search", "stats", "ping", "refresh")
+
+def defaultSocketPath():
+	"""
+	Returns the socket path from $DEVCONFIG_SOCKET, or devconfig.sock in the
+	per-user runtime directory ($XDG_RUNTIME_DIR, otherwise ~/.devconfig), 
+	which only its owner can get into.
+	"""
+	if os.environ.get("DEVCONFIG_SOCKET"):
+		return os.environ["DEVCONFIG_SOCKET"]
+	runDir = os.environ.get("XDG_RUNTIME_DIR") or os.path.join(
+		os.path.expanduser("~"), ".devconfig")
+	return os.path.join(runDir, "devconfig.sock")
+
+def checkOwner(path):
+	"""
+	Raises socket.error if the path exists and is not owned by the current
+	user, so requests are never sent to (and sockets never removed for)
+	another user.
+	"""
+	owner = os.lstat(path).st_uid if os.path.lexists(path) else os.getuid()
+	if owner != os.getuid():
+		raise socket.error("{0} is owned by uid {1}, not {2}".format(
+			path, owner, os.getuid()))
+
+#################################################################################
+#                                    Client                                     #
+#################################################################################
+
+def request(command, args=(), kwargs=None, socketPath=None, timeout=60.0):
+	"""
+	Sends one request to the daemon and returns its reply dictionary. Raises
+	socket.error if no daemon is listening on the socket.
+	"""
+	sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+	sock.settimeout(timeout)
+	try:
+		socketPath = socketPath or defaultSocketPath()
+		checkOwner(socketPath)
+		sock.connect(socketPath)
+		sock.sendall(json.dumps({"command" : command,
+		                         "args"    : list(args),
+		                         "kwargs"  : kwargs or {}}) + "\n")
+		sock.shutdown(socket.SHUT_WR)
+		chunks = []
+		while True:
+			chunk = sock.recv(65536)
+			if not chunk:
+				break
+			chunks.append(chunk)
+	finally:
+		sock.close()
+	return json.loads("".join(chunks))
+
+def expandArgs(args):
+	"""
+	Returns the arguments with @fileName and '-' replaced by the arguments
+	they hold, as the daemon cannot read the client's files or stdin.
+	"""
+	expanded = []
+	for arg in args:
+		if isArgFile(arg):
+			expanded.extend(iterArgLines(arg))
+		else:
+			expanded.append(arg)
+	return expanded
+
+#################################################################################
+#                                    Server                                     #
+#################################################################################
+
+def dcfgServer(dCfg, socketPath=None):
+	"""
+	Returns a UNIX socket server answering requests with the inputted
+	devconfig instance. Requests are handled one at a time as the instance is
+	not thread safe. A stale socket file is replaced but a live daemon is not.
+	The socket directory is created private to the user if missing, and a
+	directory or socket owned by anyone else is refused.
+	"""
+	from SocketServer import UnixStreamServer, StreamRequestHandler
+
+	class dcfgRequestHandler(StreamRequestHandler):
+		def handle(self):
+			reply = handleRequest(self.server.dCfg, self.rfile.readline())
+			try:
+				self.wfile.write(json.dumps(reply) + "\n")
+			except socket.error:
+				pass                      #Client went away
+
+	socketPath = socketPath or defaultSocketPath()
+	runDir     = os.path.dirname(os.path.abspath(socketPath))
+	if not os.path.isdir(runDir):
+		os.makedirs(runDir, 0o700)
+	dirStat = os.stat(runDir)
+	if dirStat.st_uid != os.getuid() or (dirStat.st_mode & stat.S_IWOTH and
+	                                     not dirStat.st_mode & stat.S_ISVTX):
+		raise RuntimeError("Refusing to serve from {0}: it is not owned by \
+the current user, or others can replace files in it".format(runDir))
+	if os.path.lexists(socketPath):
+		checkOwner(socketPath)
+		try:
+			request("ping", socketPath=socketPath, timeout=1.0)
+		except socket.error:
+			os.remove(socketPath)
+		else:
+			raise RuntimeError("A devconfig daemon is already listening on \
+{0}".format(socketPath))
+	oldMask = os.umask(0o077)             #Socket is only usable by its owner
+	try:
+		server = UnixStreamServer(socketPath, dcfgRequestHandler)
+	finally:
+		os.umask(oldMask)
+	server.dCfg = dCfg
+	return server
+
+def serve(dCfg, socketPath=None, out=None):
+	"""
+	Warms up the devconfig instance and answers requests on the socket until
+	interrupted, removing the socket on the way out.
+	"""
+	out    = out or sys.stdout
+	server = dcfgServer(dCfg, socketPath)
+	start  = time.time()
+	dCfg.warm()
+	out.write("Warmed up in {0:.3f} s, serving on {1}\n".format(
+		time.time() - start, server.server_address))
+	out.flush()
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		pass
+	finally:
+		server.server_close()
+		if os.path.exists(server.server_address):
+			os.remove(server.server_address)
+
+def handleRequest(dCfg, line):
+	"""
+	Runs the JSON request on the devconfig instance and returns the reply
+	dictionary. Everything the command writes or prints is captured as the
+	output, and the instance attributes a request can set (hutches, objTypes,
+	mode...) are restored afterwards so requests do not leak into each other.
+	"""
+	start = time.time()
+	out   = StringIO()
+	reply = {"ok":False, "output":"", "error":None}
+	try:
+		req     = toStr(json.loads(line))
+		command = req["command"]
+		args    = req.get("args", [])
+		kwargs  = req.get("kwargs", {})
+		if command not in daemonCommands:
+			raise ValueError("Invalid command: '{0}'. Command must be one of \
+{1}".format(command, ", ".join(daemonCommands)))
+		# Nobody is there to answer prompts about unresolved PVs
+		kwargs.update(out=out, strict=True)
+		state = dCfg._getInstanceState()
+		oldStdout, sys.stdout = sys.stdout, out
+		try:
+			if command == "diff":
+				dCfg.Diff(*args, **kwargs)
+			elif command == "view":
+				dCfg.view(*args, **kwargs)
+			elif command == "search":
+				dCfg.search(*args, **kwargs)
+			elif command == "stats":
+				out.write(json.dumps(dCfg.stats(), indent=1, default=str) + "\n")
+			elif command == "refresh":
+				dCfg.refresh(kwargs.get("mode"))
+				dCfg.warm()
+				state["_mode"] = dCfg._mode   #Keep the refreshed mode
+		finally:
+			sys.stdout = oldStdout
+			dCfg._setInstanceState(state)
+		reply["ok"] = True
+	except Exception as e:
+		reply["error"] = "{0}: {1}".format(type(e).__name__, e)
+	reply["output"]  = out.getvalue()
+	reply["seconds"] = time.time() - start
+	return reply
+
+def toStr(obj):
+	"""Returns the decoded JSON with its unicode strings turned into str."""
+	if isinstance(obj, unicode):
+		return obj.encode("utf-8")
+	elif isinstance(obj, list):
+		return [toStr(item) for item in obj]
+	elif isinstance(obj, dict):
+		return {toStr(key):toStr(val) for key, val in obj.iteritems()}
+	return obj
+
+#################################################################################
+#                                     Main                                      #
+#################################################################################
+
+def main():
+	parser = OptionParser(usage="%prog [options] {0} [args]".format(
+		"|".join(daemonCommands)))
+	parser.add_option('--socket', action='store', type='string',
+	                  dest='socket', default=None)
+	parser.add_option('--timeout', action='store', type='float',
+	                  dest='timeout', default=60.0)
+	parser.add_option('--hutch', action='store', type='string', dest='hutches',
+	                  default=None)
+	parser.add_option('--objType', action='store', type='string',
+	                  dest='objTypes', default=None)
+	parser.add_option('--match', action='store', type='string',
+	                  dest='match', default='exact')
+	parser.add_option('--pmgr', '-p', action='store_true', dest='pmgr',
+	                  default=False)
+	parser.add_option('--tooltip', '-t', action='store_true', dest='tooltip',
+	                  default=False)
+	parser.add_option('--summary', '-s', action='store_true', dest='summary',
+	                  default=False)
+	parser.add_option('--offset', action='store',type='int',  dest='offSet',
+	                  default=0)
+	options, args = parser.parse_args()
+	if not args or args[0] not in daemonCommands:
+		parser.error("A valid command is required: {0}".format(
+			", ".join(daemonCommands)))
+	kwargs     = vars(options)
+	socketPath = kwargs.pop("socket")
+	timeout    = kwargs.pop("timeout")
+	try:
+		reply = request(args[0], expandArgs(args[1:]), kwargs, socketPath,
+		                timeout)
+	except socket.error as e:
+		sys.stderr.write("Could not reach the devconfig daemon on {0}: {1}\n\
+Start one with 'devconfig.py serve'.\n".format(socketPath or
+		                                          defaultSocketPath(), e))
+		return 2
+	sys.stdout.write(reply["output"])
+	if not reply["ok"]:
+		sys.stderr.write(reply["error"] + "\n")
+		return 1
+	return 0
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -1,20 +1,37 @@
 #!/usr/bin/python
 
 import logging
+import time
+import re
 import numpy as np
 # from sys import exit
 # from difflib import get_close_matches
+import sys
 from os import path, getcwd
-from pandas import DataFrame, Series, read_csv
+from sys import stdout
+from fnmatch import translate
+from pandas import DataFrame, Series, read_csv, concat
 from exceptionClasses import *
-from pmgr.pmgrobj import pmgrobj
 from optparse import OptionParser
 from ConfigParser import SafeConfigParser
 from ast import literal_eval
 from collections import Iterable
-from psp.Pv import get
-from itertools import islice
-from pyca import pyexc
+from itertools import islice, groupby
+from functools import partial
+from multiprocessing import Pool
+from multiprocessing.pool import ThreadPool
+from caReader import BatchReader, BatchWriter, MonitorCache, NegativeCache
+from pmgrPool import pmgrPool
+from metaCache import metaCache, defaultCachePath
+from diffEngine import fldMatrix, pairDiffMask, anyDiffMask, maxValLen
+from render import colWidth, iterTable, writeLines
+from asyncCalls import submit, submitLoad, gather
+from profiler import phaseTimer
+from searchIndex import pmgrSearchIndex
+from snapshot import snapshot, writeSnapshot, diffSnapshots
+from fieldSpec import compileFldMap
+from prefixTrie import prefixTrie
+from argFiles import isArgFile, iterArgLines
 
 from pprint import pprint
 
@@ -60,11 +77,46 @@ class devconfig(object):
 		self._loggingPath     = DataFrame()   #DF of hutch, objType, path
 		self._zenity          = DataFrame()   #DF of hutch, objType, bool
 		self._objTypeFldMaps  = {}            #Dict of objType:FldMapDF pairs
+		self._objTypeFldSpecs = {}            #Dict of objType:fieldMap pairs
+		self._enumMismatches  = {}            #Dict of (objType,fld):count
+		self._hutchTrie       = prefixTrie()  #Trie of PV prefix:hutches
+		self._strict          = kwargs.get("strict")  #Raise on unresolved PVs
+		if self._strict is None:
+			self._strict      = not isInteractive()
 		self._aliases         = set()         #Set of all known aliases
+		self._aliasHutches    = {}            #Dict of alias:set of hutches
+		self._objTypeIDMap    = {}            #Dict of objType:ID field
+		self._objTypeNameMap  = {}            #Dict of objType:name
+		self._objTypeSumMap   = {}            #Dict of objType:summary fields
+		self._objTypeKeyMap   = {}            #Dict of (hutch,objType):keys
 		self._pmgr            = None          #Pmgr used for dcfg operations
+		self._objIndexes      = {}            #Dict of (objType,hutch):(ver,idx,IDs)
+		self._searchIndex     = None          #Inverted index over pmgr tables
+		self._searchVersions  = {}            #Dict of (hutch,objType):version
+		self._pmgrPool        = pmgrPool(kwargs.get("pmgrFactory", newPmgr),
+		                                 kwargs.get("pmgrMaxAge", 60.0),
+		                                 kwargs.get("pmgrFullSyncAge", 3600.0))
 		self._logger          = None          #devconfig logger
+		self._metaCache       = metaCache(kwargs.get("metaCachePath",
+		                                  defaultCachePath(directory + "/db")),
+		                                  kwargs.get("metaCache", True))
+		self._negCache        = None          #Devices and IOCs that failed
+		if kwargs.get("negCache", True):
+			self._negCache    = NegativeCache(kwargs.get("negCacheMaxAge", 30.0))
+		self._liveReader      = BatchReader(kwargs.get("caBackend"),
+		                                    kwargs.get("caTimeout", 1.0),
+		                                    self._negCache)
+		if kwargs.get("liveCache", False):
+			self._liveReader  = MonitorCache(self._liveReader,
+			                                 kwargs.get("liveCacheSize", 5000),
+			                                 kwargs.get("liveCacheMaxAge", 60.0))
+		self._liveWriter      = BatchWriter(kwargs.get("caBackend"),
+		                                    kwargs.get("caTimeout", 1.0))
 		# self._successfulInit  = False         #Attr to check if init was successful
-		self._setAttrs()
+		self._initKwargs      = dict(kwargs)  #Used to recreate dcfg in workers
+		self._profiler        = phaseTimer(kwargs.get("profile", False))
+		with self._profiler.phase("metadata"):
+			self._setAttrs()
 		self._initLogger()                #Setup the logger
 		self._setInstanceAttrs(kwargs)    #Fills in instance attrs using inputs
 		# self._setPmgr
@@ -81,13 +133,59 @@ class devconfig(object):
 			self._setHutches(kwargs["hutches"])
 		if "objTypes" in kwargs.keys() and kwargs["objTypes"]:
 			self._setObjTypes(kwargs["objTypes"])
+		if kwargs.get("strict") is not None:
+			self._strict = kwargs["strict"]
+		if kwargs.get("negCacheMaxAge") is not None and self._negCache:
+			self._negCache.maxAge = kwargs["negCacheMaxAge"]
 		try:
 		    self._setMode(kwargs["mode"])
 		except (ValueError, KeyError):
 			self._localMode = "pmgr"
 			
+	def _getCallScope(self, kwargs):
+		"""
+		Returns the (hutches, objTypes, strict) a call with the inputted kw 
+		arguments runs with, falling back on the instance attributes. Unlike
+		_setInstanceAttrs nothing is set on the instance.
+		"""
+		hutches, objTypes = self._hutches, self._objTypes
+		if kwargs.get("hutches"):
+			hutches = self._getHutchLists(kwargs["hutches"])
+		if kwargs.get("objTypes"):
+			objTypes = self._getObjTypeSet(kwargs["objTypes"])
+		strict = kwargs.get("strict")
+		if strict is None:
+			strict = self._strict
+		return hutches, objTypes, strict
+
+	def _getInstanceState(self):
+		"""
+		Returns the instance attributes the kw arguments of a call can change,
+		to be restored with _setInstanceState.
+		"""
+		state = {attr:getattr(self, attr) for attr in ("_hutches", "_objTypes",
+		         "_strict", "_mode", "_localMode") if hasattr(self, attr)}
+		if self._negCache is not None:
+			state["negCacheMaxAge"] = self._negCache.maxAge
+		return state
+
+	def _setInstanceState(self, state):
+		"""Restores instance attributes saved by _getInstanceState."""
+		state = dict(state)
+		if "negCacheMaxAge" in state:
+			self._negCache.maxAge = state.pop("negCacheMaxAge")
+		for attr, val in state.iteritems():
+			setattr(self, attr, val)
+
 	def _setHutches(self, inpHutches):
 		"""Sets _hutches checking _hutchAliases and _allHutches."""
+		self._hutches = self._getHutchLists(inpHutches)
+
+	def _getHutchLists(self, inpHutches):
+		"""
+		Returns the lists of valid hutches of the inputted hutches, checking
+		_hutchAliases and _allHutches.
+		"""
 		if not isiterable(inpHutches):
 			inpHutches = [[inpHutches]]
 		elif not isiterable(inpHutches[0]):
@@ -97,12 +195,12 @@ class devconfig(object):
 		    valid, invalid = self._getValidHutches(hutches)
 		    validHutches.append(valid)
 		    invalidHutches.append(invalid)
-		if not validHutches:
+		if not any(validHutches):
 			raise InvalidHutchError(inpHutches)
-		elif invalidHutches:
+		elif any(invalidHutches):
 			print "Invalid hutch entries '{0}', not included in hutch \
 list".format(invalidHutches)
-		self._hutches = validHutches
+		return validHutches
 
 	def _getValidHutches(self, inpHutches):
 		"""Returns a valid and invalid list of hutches given the inputted list.""" 
@@ -112,26 +210,11 @@ list".format(invalidHutches)
 		aliasesFound = set(a for a in hutches if a in self._aliases)
 		for alias in aliasesFound:
 			hutches.remove(alias)
-			hutches.add(self._getValWhereTrue(self._hutchAliases, 'hutch',
-			                                  'hutchAliases', alias))
+			hutches.update(self._getAliasHutches(alias))
 		validHutches = hutches.intersection(self._allHutches)
 		invalidHutches = hutches - self._allHutches
 		return list(validHutches), list(invalidHutches)
 
-	def _getValWhereTrue(self, DF, col1, col2, val):
-		"""Return the values of col1 where col2 == val."""
-		val = DF.loc[self._getIdxWhereTrue(DF, col2, val)][col1]
-		if len(val.tolist()) > 1:
-			return val.tolist()
-		else:
-			return ''.join(str(v) for v in val)
-
-	def _getIdxWhereTrue(self, DF, col, val):
-		"""Returns the row index where col == val."""
-		if isinstance(val, basestring):
-			boolSer = DF[col].str.contains(val)
-			return boolSer[boolSer == True].index.tolist()
-
 	def _getHutchObjTypeVal(self, DF, col, hutch, objType = None):
 		if objType is not None:
 		    return  DF[(DF.hutch==hutch) & (DF.objType==objType)][col].tolist()
@@ -140,11 +223,15 @@ list".format(invalidHutches)
 
 	def _setObjTypes(self, inpObjTypes):
 		"""Sets _objTypes checking _allObjTypes."""
+		self._objTypes = self._getObjTypeSet(inpObjTypes)
+
+	def _getObjTypeSet(self, inpObjTypes):
+		"""Returns the set of valid objTypes of the inputted ones."""
 		objTypes = {objType.lower() for objType in set(inpObjTypes)}
 		validObjTypes = objTypes.intersection(self._allObjTypes)
 		if not validObjTypes:
 			raise InvalidObjTypeError(inpObjTypes)
-		self._objTypes = validObjTypes
+		return validObjTypes
 
 	def _setMode(self, mode):
 		"""Sets mode. Takes pmgr or local."""
@@ -188,6 +275,7 @@ list".format(invalidHutches)
 			# ...
 			# Load everything from the pmgr
 			# ...
+			self._compileLookups()
 		except (pmgrInitError, InvalidHutchError, InvalidObjTypeError,
 		        LocalModeEnabled):
 			self._setAttrsLocal()
@@ -199,27 +287,52 @@ list".format(invalidHutches)
 		"""
 		Returns a pmgr object with the inputted objType and hutch. Because only
 		one pmgrObj can be used at a time, entries for objType and hutch must be
-		a single objType and hutch, not multiple.
+		a single objType and hutch, not multiple. Handles are reused from the
+		pmgr pool, so tables are only reloaded once they have gone stale.
 		"""
-		if not isinstance(objType, basestring) or 
-			not isinstance(hutch, basestring):
+		if (not isinstance(objType, basestring) or 
+		    not isinstance(hutch, basestring)):
 			raise typeError('str')
 		if objType.lower() not in self._allObjTypes:
 			raise InvalidObjTypeError(objType)
 		if hutch.lower() not in self._allHutches:
 			raise InvalidHutchError(hutch)
 		try:
-			pmgr = pmgrobj(objType.lower(), hutch.lower())
-			pmgr.updateTables()
+			with self._profiler.phase("pmgr load"):
+				return self._pmgrPool.get(objType.lower(), hutch.lower())
 		except:
 			raise pmgrInitError(objType, hutch)
-		return pmgr
 		
 	def _setAttrsLocal(self):
 		"""
 		Grabs as many devconfig pmgr-attributes from a local cfg file as it can.
+		The attributes, slices and compiled lookups alike, come from the 
+		metadata cache until the file changes.
+		"""
+		metaAttrs = self._metaCache.load(directory + "/db/localMode.csv", 
+		                                 self._compileLocalMeta)
+		for attr, val in metaAttrs.iteritems():
+			setattr(self, attr, val)
+
+	def _compileLocalMeta(self, csvPath):
 		"""
-		self._allMetaData     = self._readLocalCSV('db/localMode.csv')
+		Parses the localMode csv, sets the metadata slices and compiles the
+		lookups, returning a dictionary of every attribute set for the cache.
+		"""
+		self._allMetaData = self._parseLocalCSV(csvPath)
+		self._setMetaSlices()
+		self._compileLookups()
+		return {attr:getattr(self, attr) for attr in (
+			"_allMetaData", "_allHutches", "_allObjTypes", "_globalMode", 
+			"_hutchAliases", "_objTypeNames", "_objTypeIDs", "_objTypeKeys",
+			"_objTypeSumFlds", "_savePreHooks", "_savePostHooks", 
+			"_applyPreHooks", "_applyPostHooks", "_verbosity", "_logLevel", 
+			"_loggingPath", "_zenity", "_aliases", "_aliasHutches", 
+			"_objTypeIDMap", "_objTypeNameMap", "_objTypeSumMap", 
+			"_objTypeKeyMap", "_hutchTrie")}
+
+	def _setMetaSlices(self):
+		"""Sets the metadata slices of the allMetaData DF."""
 		self._allHutches      = self._getSlice('hutch', outType = set)
 		self._allObjTypes     = self._getSlice('objType', outType = set)
 		self._globalMode      = self._getSlice('globalMode')
@@ -241,21 +354,62 @@ list".format(invalidHutches)
 		self._zenity          = self._getSlice('zenity')
 		self._aliases         = self._getAliases()
 
-	def _readLocalCSV(self, csv, repNan = '', idxCol = None):
+	def _compileLookups(self):
 		"""
-		Reads in a dataframe from the inputted localMode file path. A convenience 
-		method to perform whatever preprocessing is necessary before using the 
-		data.
+		Compiles the metadata DFs into plain dictionaries so that the lookups
+		done inside the per-PV and per-field loops are simple hash lookups.
 		"""
-		df = read_csv(directory + "/" + csv, index_col = idxCol)
+		self._aliasHutches = {}
+		for hutch, aliases in self._hutchAliases.values:
+			for alias in aliases:
+				self._aliasHutches.setdefault(alias, set()).add(hutch)
+		self._objTypeIDMap   = dict(self._objTypeIDs.values)
+		self._objTypeNameMap = dict(self._objTypeNames.values)
+		self._objTypeSumMap  = {objType:tuple(sumFlds) for objType, sumFlds in 
+		                        self._objTypeSumFlds.values}
+		self._objTypeKeyMap  = {(hutch, objType):tuple(keys) for hutch, objType, 
+		                        keys in self._objTypeKeys.values}
+		self._hutchTrie = prefixTrie()
+		for alias, hutches in self._aliasHutches.iteritems():
+			self._hutchTrie.add(alias, tuple(sorted(hutches)))
+		for hutch in self._allHutches:
+			self._hutchTrie.add(hutch, (hutch,))
+
+	def _getAliasHutches(self, alias):
+		"""Returns the set of hutches the alias refers to."""
+		return self._aliasHutches.get(alias, set())
+
+	def _getObjTypeID(self, objType):
+		"""Returns the identifying field of the objType."""
+		return self._objTypeIDMap[objType]
+
+	def _getObjTypeName(self, objType):
+		"""Returns the real-world name of the objType."""
+		return self._objTypeNameMap[objType]
+
+	def _getObjTypeSumFlds(self, objType):
+		"""Returns the tuple of summary fields of the objType."""
+		return self._objTypeSumMap[objType]
+
+	def _getObjTypeKeys(self, hutch, objType):
+		"""Returns the tuple of PV keys used by the objType in the hutch."""
+		return self._objTypeKeyMap.get((hutch, objType), ())
+
+	def _compileFldMap(self, csvPath):
+		"""Returns the field map DF of the csv and its compiled FieldSpecs."""
+		fldMap = self._parseLocalCSV(csvPath, repNan = "[]", idxCol = 0)
+		return fldMap, compileFldMap(fldMap)
+
+	def _parseLocalCSV(self, csvPath, repNan = '', idxCol = None):
+		"""Parses the csv into a dataframe, evaluating any list/tuple columns."""
+		df = read_csv(csvPath, index_col = idxCol)
 		df = df.fillna(repNan)
 		for column in df.columns:
 			if df[column].dtype == "O":
-				if (any(df[column].str.contains(r'\[\]')) or 
-				    any(df[column].str.contains(r'\(\)'))):
+				if any(df[column].str.match(r'^\s*[\[\(].*[\]\)]\s*$')):
 					try:
 						df[column] = df[column].apply(literal_eval)
-					except ValueError:
+					except (ValueError, SyntaxError):
 						# Figure this out
 						pass
 		return df
@@ -294,11 +448,15 @@ list".format(invalidHutches)
 		return set([alias for tupAlias in allAliases for alias in tupAlias])
 
 	def _getObjTypeFLDMaps(self):
-		"""Reads the fld_maps stored in the db folder."""
+		"""
+		Reads the fld_maps stored in the db folder, along with their compiled
+		FieldSpecs, from the metadata cache.
+		"""
 		try:
 			for objType in self._allObjTypes:
-				self._objTypeFldMaps[objType] = self._readLocalCSV(
-					"db/"+objType+".csv", repNan = "[]", idxCol = 0)
+				(self._objTypeFldMaps[objType], 
+				 self._objTypeFldSpecs[objType]) = self._metaCache.load(
+					directory + "/db/" + objType + ".csv", self._compileFldMap)
 		except :
 			print "Failed to read fldMaps."
 		# 	print 
@@ -347,23 +505,148 @@ list".format(invalidHutches)
 	#############################################################################
 
 	def search(self, *args, **kwargs):
-		raise NotImplementedError()
-
-	def _search(self, *args, **kwargs):		
-		raise NotImplementedError()
-
-	def _getObjWithID(self, devID, fldID):
+		"""
+		Prints the pmgr objs and cfgs matching all the inputted search terms in
+		the instance hutches (every hutch if none are set). The match kwarg sets
+		how terms are matched: 'exact', 'prefix' or 'fuzzy'.
+		"""
+		self._setInstanceAttrs(kwargs)
+		out     = kwargs.get("out") or stdout
+		matches = self._search(*args, **kwargs)
+		out.write("Number of Matches: {0}\n".format(len(matches)))
+		if not matches:
+			return
+		header = ["Hutch", "Type", "ID", "Name"] + list(self._searchIndex.objFlds[1:])
+		header += ["Score"]
+		rows   = [[match["hutch"], match["kind"], match["id"], match["name"]] +
+		          [match.get(fld, "") for fld in header[4:-1]] + 
+		          ["{0:.2f}".format(match["score"])] for match in matches]
+		widths = [colWidth((len(str(row[i])) for row in rows), len(name)) for 
+		          i, name in enumerate(header)]
+		writeLines(iterTable(header, rows, widths, len(header) - 1), out)
+
+	def _search(self, *args, **kwargs):
+		"""
+		Returns a list of match dictionaries for the pmgr rows matching all of
+		the inputted terms, best matches first. The search index is brought up
+		to date with the current pmgr tables before querying.
+		"""
+		match    = kwargs.get("match", "exact")
+		hutches  = sorted(set(flatten(self._hutches))) or sorted(self._allHutches)
+		objTypes = sorted(self._objTypes) or sorted(self._allObjTypes)
+		pmgrs    = self._updateSearchIndex(hutches, objTypes)
+		scores   = None
+		with self._profiler.phase("search", len(args)):
+			for term in args:
+				termScores = self._searchIndex.search(term, match)
+				if scores is None:
+					scores = termScores
+				else:
+					scores = {key:scores[key] * termScores[key] for key in 
+					          scores if key in termScores}
+		matches = []
+		for key, score in (scores or {}).iteritems():
+			hutch, objType, kind, rowID = key
+			if (hutch, objType) not in pmgrs:
+				continue
+			pmgr = pmgrs[(hutch, objType)]
+			row  = pmgr.objs[rowID] if kind == "obj" else pmgr.cfgs[rowID]
+			match = {fld:row.get(fld, "") for fld in self._searchIndex.objFlds}
+			match.update({"hutch":hutch, "objType":objType, "kind":kind, 
+			              "id":rowID, "score":score})
+			matches.append(match)
+		matches.sort(key=lambda match: (-match["score"], match["hutch"], 
+		                                match["kind"], match["id"]))
+		return matches
+
+	def _updateSearchIndex(self, hutches, objTypes):
+		"""
+		Folds the current pmgr tables of the hutches and objTypes into the 
+		search index, creating it the first time. Only the rows the pmgr pool
+		synced since the last update are folded in when it knows them. Returns
+		a dictionary of (hutch, objType) to pmgr for the pmgrs that could be
+		loaded.
+		"""
+		if self._searchIndex is None:
+			sumFlds = []
+			for objType in sorted(self._allObjTypes):
+				sumFlds += [fld for fld in self._getObjTypeSumFlds(objType) if 
+				            fld not in sumFlds]
+			self._searchIndex = pmgrSearchIndex(["name"] + sumFlds)
+		pmgrs = {}
+		with self._profiler.phase("search index"):
+			for hutch in hutches:
+				for objType in objTypes:
+					try:
+						pmgr = self._getPmgr(objType, hutch)
+					except pmgrInitError:
+						print "Could not load the pmgr for {0} {1}, \
+skipping.".format(hutch, objType)
+						continue
+					pmgrs[(hutch, objType)] = pmgr
+					# Version first: tables swapped in after it are only ever
+					# newer, and get indexed again on the next search
+					version = self._pmgrPool.version(objType, hutch)
+					objs, cfgs = pmgr.objs, pmgr.cfgs
+					indexed = self._searchVersions.get((hutch, objType))
+					if indexed == version:
+						continue
+					changes = self._pmgrPool.changes(objType, hutch, indexed)
+					if changes is None:
+						self._searchIndex.update(hutch, objType, objs, cfgs, 
+						                         force=True)
+					else:
+						self._searchIndex.updateRows(hutch, objType, "obj", 
+						                             objs, changes["obj"])
+						self._searchIndex.updateRows(hutch, objType, "cfg", 
+						                             cfgs, changes["cfg"])
+					self._searchVersions[(hutch, objType)] = version
+		return pmgrs
+
+	def _getObjWithID(self, devID, objType, hutch):
 		"""
 		Returns the obj ID of the device using the device ID. Returns None if 
 		no entry was found.
 		"""
-		pmgr  = self._pmgr
-		devID = str(devID)
-		pmgr.updateTables()
-		for objID in pmgr.objs.keys():
-			if devID == pmgr.objs[objID][fldID]:
-				return objID
-		return None
+		with self._profiler.phase("obj lookup"):
+			return self._getObjIndex(objType, hutch).get(str(devID))
+
+	def _getObjIndex(self, objType, hutch):
+		"""
+		Returns a dictionary of device ID to obj ID for the objType and hutch
+		pmgr. The index is keyed on the objType ID field. Only the objs the 
+		pmgr pool synced since the index was last brought up to date are 
+		reindexed, and it is only rebuilt when the pool does not know them.
+		"""
+		pmgr    = self._getPmgr(objType, hutch)
+		version = self._pmgrPool.version(objType, hutch)
+		objs    = pmgr.objs               #Read after the version, never older
+		fldID   = self._getObjTypeID(objType)
+		try:
+			idxVersion, index, devIDs = self._objIndexes[(objType, hutch)]
+		except KeyError:
+			changes = None
+		else:
+			if idxVersion == version:
+				return index
+			changes = self._pmgrPool.changes(objType, hutch, idxVersion)
+		if changes is None:
+			index, devIDs = {}, {}
+			changed = objs.iterkeys()
+		else:
+			changed = sorted(changes["obj"])
+			for objID in changed:
+				devID = devIDs.pop(objID, None)
+				if index.get(devID) == objID:
+					del index[devID]
+		for objID in changed:
+			if objID not in objs:
+				continue
+			devID = devIDs[objID] = str(objs[objID].get(fldID))
+			# Keep the first obj found for a device ID like the old linear scan
+			index.setdefault(devID, objID)
+		self._objIndexes[(objType, hutch)] = (version, index, devIDs)
+		return index
 
 	#############################################################################
 	#                                   View                                    #
@@ -394,140 +677,215 @@ list".format(invalidHutches)
 		self._setInstanceAttrs(kwargs)
 		summary  = kwargs.get("summary", False)
 		tooltip  = kwargs.get("tooltip", True)
+		out      = kwargs.get("out") or stdout
 		Pvs, IDs = self._inferFromArgs(args)
-		self._inferFromPvs(Pvs)
-		fldMap   = self._objTypeFldMaps[self._objTypes[0]]   #Check if this is okay
-		devName  = self._getValWhereTrue(self._objTypeNames, "objTypeNames",
-		                                "objType", self._objTypes[0])
-		numPvs, numIDs = len(Pvs), len(IDs)
+		if not Pvs:
+			if IDs:
+				raise NotImplementedError()
+			return self._writeNoMatch(args, out)
+		hutches, objTypes = self._inferFromPvs(Pvs)
+		devName  = self._getObjTypeName(objTypes[0])
 
 		# Assumptions for now
 		# - The Entries definitely exist as a pv or a pmgr entry
 
-		liveFlds = [self._getLiveFldDict(Pv, objtype) for Pv, objtype in zip(
-			Pvs, self._objTypes)]
-		pmgrFlds = [self._getPmgrFldDict(Pv, objType, hutch) for Pv, objType, 
-		            hutch in zip(Pvs, self._objTypes, flatten(self._hutches))]
-
-
-		liveDfs  = [self._getLiveViewDf(Pv, liveFld, objType, hutch, summary) 
-		            for Pv, liveFld, objtype, hutch in zip(
-			            Pvs, liveFlds, self._objTypes, flatten(self._hutches))]
-
+		viewDfs = self._getViewDfs(Pvs, objTypes, hutches, summary)
+		index   = ['Parameter', 'Tooltip'] if tooltip else ['Parameter']
+		if not tooltip:
+			viewDfs = [viewDf.drop('tooltip', 1) for viewDf in viewDfs]
+		with self._profiler.phase("render", len(viewDfs)):
+			lenCols = self._getViewLenCols(set(objTypes), viewDfs, tooltip)
+			for Pv, viewDf in zip(Pvs, viewDfs):
+				out.write("{0} PV: {1}\n".format(devName.capitalize(), Pv))
+				writeLines(self._iterView(viewDf, index, lenCols = lenCols), 
+				           out)
+				out.write("\n")
+		self._writeUnreachable(Pvs, out)
+
+	def _getViewDfs(self, Pvs, objTypes, hutches, summary = False, 
+	                liveFlds = None):
+		"""
+		Returns a list of view dfs for the inputted PVs, reading their live 
+		fields unless they are passed in.
+		"""
+		if liveFlds is None:
+			liveFlds = self._getLiveFldDicts(Pvs, objTypes)
+		return [self._getLiveViewDf(Pv, liveFld, objType, hutch, summary) 
+		        for Pv, liveFld, objType, hutch in zip(
+			        Pvs, liveFlds, objTypes, hutches)]
 
 	def _getLiveFldDict(self, Pv, objType):
 		"""Returns a dictionary of fields to values for the inputted PV."""
+		return self._getLiveFldDicts([Pv], [objType])[0]
+
+	def _getLiveFldDicts(self, Pvs, objTypes):
+		"""
+		Returns a list of field dictionaries, one for each of the inputted PVs.
+		The fields of all the devices are read together in a single batch.
+		"""
+		chanNames = []
+		devices   = {}                    #Dict of chan:Pv
+		for Pv, objType in zip(Pvs, objTypes):
+			chans = self._getDeviceChans(Pv, objType)
+			chanNames += chans
+			devices.update(dict.fromkeys(chans, Pv))
+		with self._profiler.phase("ca read", len(chanNames)):
+			values = self._liveReader.read(chanNames, devices=devices)
+		with self._profiler.phase("field decode", len(chanNames)):
+			return [self._toLiveFldDict(Pv, objType, values) for Pv, objType 
+			        in zip(Pvs, objTypes)]
+
+	def _toLiveFldDict(self, Pv, objType, values):
+		"""
+		Returns the field dictionary of the inputted PV using the values read
+		by the batch reader.
+		"""
 		noConStr  = "NO CON"
 		fldDict   = {}
-		fldMap    = self._objTypeFldMaps[objType]
-		objTypeID = self._getValWhereTrue(self._objTypeIDs, 'objTypeIDs', 
-		                                  'objType', objType)
-		for fld in fldMap.index:
+		fldSpecs  = self._objTypeFldSpecs[objType]
+		noCon     = 0
+		for spec, decoder, chan in zip(fldSpecs, fldSpecs.decoders, 
+		                               self._getDeviceChans(Pv, objType)):
+			val = values[chan]
+			if val is None:
+				fldDict[spec.fld] = noConStr
+				noCon += 1
+			elif decoder is None:
+				fldDict[spec.fld] = str(val)
+			else:
+				fldDict[spec.fld] = self._decodeEnum(objType, spec, decoder, val)
+		if noCon == len(fldSpecs):
+			print "Could not connect to '{0}'. Setting to '{1}'.".format(
+				Pv, noConStr)
+		elif noCon:
+			print "Could not connect to {0} of the fields of '{1}'. Setting \
+to '{2}'.".format(noCon, Pv, noConStr)
+		return fldDict
+
+	def _getDeviceChans(self, Pv, objType):
+		"""
+		Returns the full channel names of the fields of the device, in field
+		map order. They are built from the compiled pv suffixes on every call
+		rather than kept per device, so memory does not grow with the number
+		of devices seen by a long-running instance.
+		"""
+		return tuple(Pv + pvExt for pvExt in self._objTypeFldSpecs[objType].pvs)
+
+	def _decodeEnum(self, objType, spec, decoder, val):
+		"""
+		Returns the enum string of the value read from an enum field. Indices
+		outside the pmgr enum are decoded as the first enum string and counted
+		per field, with a warning printed only the first time for each field.
+		"""
+		enumStr = decoder.get(val)
+		if enumStr is None:
 			try:
-				fldDict[fld] = str(get(Pv + fldMap.loc[fld]['pv']))
-				if fldMap.enum[fld]:
-					try:
-						fldDict[fld] = str(fldMap.enum[fld][int(fldDict[fld])])
-					except IndexError:
-						print "WARNING: index mismatch in field {0}.".format(fld) 
-						print "An ioc has been updated without updating the \
+				enumStr = decoder.get(int(val))
+			except (TypeError, ValueError):
+				pass
+		if enumStr is None:
+			key = (objType, spec.fld)
+			if key not in self._enumMismatches:
+				self._enumMismatches[key] = 0
+				print "WARNING: index mismatch in field {0}.".format(spec.fld) 
+				print "An ioc has been updated without updating the \
 Parameter Manager!"
-						fldDict[fld] = fldMap.enum[fld][0]
-			except pyexc:
-				print "Could not connect to '{0}'. Setting to '{1}'.".format(
-					Pv + fldMap.loc[fld]['pv'], noConStr)
-				fldDict[fld] = noConStr
-		return fldDict
+			self._enumMismatches[key] += 1
+			enumStr = spec.enum[0]
+		return enumStr
 
-	def _getLiveViewDf(self, Pv, fldDict, objType, summary = False):
+	def _getLiveViewDf(self, Pv, fldDict, objType, hutch, summary = False):
 		"""
 		Returns a dataframe containing the live values of the inputted device.
 		"""
-		self._pmgr  = self._getPmgr(objType, hutch)
-		self._pmgr.updateTables()
-		summaryFlds = self._objTypeSumFlds[objType]
+		pmgr        = self._getPmgr(objType, hutch)
+		summaryFlds = self._getObjTypeSumFlds(objType)
 		fldMap      = self._objTypeFldMaps[objType]
-		fldID       = self._getValWhereTrue(self._objTypeIDs, 'objTypeIDs', 
-		                               'objType', objType)		
+		fldID       = self._getObjTypeID(objType)
 		if summary:
-			liveDf = fldMap.loc[summaryFlds][['alias', 'tooltip']].reset_index()
+			liveDf = fldMap.loc[list(summaryFlds)][['alias', 'tooltip']]
 		else:
-			liveDf = fldMap[['alias', 'tooltip']].reset_index()
-		objID  = self._getObjWithID(fldDict[fldID]. fldID)
-		pmgrDf = self._getPmgrDevSum(objID)
-		viewDf = pd.concat(liveDf, pmgrDf)
+			liveDf = fldMap[['alias', 'tooltip']]
+		liveDf = liveDf.reset_index()
+		liveDf[Pv] = liveDf['index'].map(fldDict)
+		liveDf = liveDf.drop('index', 1)
+		objID  = self._getObjWithID(fldDict[fldID], objType, hutch)
+		pmgrDf = self._getPmgrDevSum(objID, pmgr)
+		pmgrDf.columns = liveDf.columns
+		viewDf = concat([liveDf, pmgrDf], ignore_index = True)
 		return viewDf
 
-	def _getPmgrDevSum(self, objID):
-		if not objID:
+	def _getPmgrDevSum(self, objID, pmgr = None):
+		"""Returns a df summarizing the pmgr entry of the obj."""
+		pmgr = pmgr or self._pmgr
+		if objID is None:
 			inPmgr, objName, cfgName, lastMod = "No", "N/A", "N/A", "N/A"
 		else:
 			inPmgr  = "Yes"
-			objName = self._pmgr.objs[objID]["name"]
-			cfgID   = self._pmgr.objs[objID]["config"]
-			cfgName = self._pmgr.cfgs[cfgID]["name"]
-			objDateMod = self._pmgr.objs[objID]['dt_updated']
-			cfgDateMod = self._pmgr.cfgs[cfgID]['dt_updated']
+			objName = pmgr.objs[objID]["name"]
+			cfgID   = pmgr.objs[objID]["config"]
+			cfgName = pmgr.cfgs[cfgID]["name"]
+			objDateMod = pmgr.objs[objID]['dt_updated']
+			cfgDateMod = pmgr.cfgs[cfgID]['dt_updated']
 			if objDateMod > cfgDateMod:
 				lastMod = objDateMod
 			else:
 				lastMod = cfgDateMod
-		pmgrInfo = [("Pmgr Entry", "Is this device in pmgr", inPmgr), 
-		            ("  Obj Name", "Pmgr object name", objName),
-		            ("  Cfg Name", "Pmgr config name", cfgName),
-		            ("  Last Modified", "Date of last entry modification",
-		             lastMod)]
-		return pd.DataFrame(pmgrInfo)
-		
-			
+		pmgrInfo = [row + (val,) for row, val in zip(pmgrSumRows, [
+			inPmgr, objName, cfgName, lastMod])]
+		return DataFrame(pmgrInfo)
 
-
-
-	def _view(self, df, nameIndexCols, **kwargs):
+	def _getNameLenCols(self, objTypes, tooltip = False, offSet = 0, 
+	                    extraRows = ()):
+		"""
+		Returns the widths of the parameter (and tooltip) columns of tables of
+		the fields of the objTypes, taken from the precomputed widths of their
+		FieldSpecs and the (alias, tooltip) of any extraRows.
+		"""
+		specs   = [self._objTypeFldSpecs[objType] for objType in objTypes]
+		lenCols = [colWidth([spec.aliasWidth for spec in specs] + [
+			len(row[0]) for row in extraRows], len('Parameter')) + offSet]
+		if tooltip:
+			lenCols.append(colWidth([spec.tooltipWidth for spec in specs] + [
+				len(row[1]) for row in extraRows], len('Tooltip')))
+		return lenCols
+
+	def _getViewLenCols(self, objTypes, viewDfs, tooltip, minColLen = 10):
 		"""
-		Generalized view routine which returns a printable string version of the
-		inputted dataframe.
+		Returns the column widths shared by the view dfs of devices of the
+		objTypes. The name columns come from the FieldSpecs and the value 
+		column from a running max over the values of all the dfs.
+		"""
+		lenCols = self._getNameLenCols(objTypes, tooltip, 
+		                               extraRows = pmgrSumRows)
+		valLen  = minColLen
+		for viewDf in viewDfs:
+			valLen = max([valLen, len(str(viewDf.columns[-1]))] + [
+				len(str(val)) for val in viewDf.iloc[:, -1].values])
+		return lenCols + [valLen]
+
+	def _iterView(self, df, nameIndexCols, **kwargs):
+		"""
+		Yields the lines of the printable version of the inputted dataframe.
+		Column widths are taken from lenCols if given (so that several tables 
+		can share them), otherwise they are computed once from the df.
 		"""
 		minColLen = kwargs.get("minColLen", 10)
 		offSet    = kwargs.get("offSet", 0)
-		lenCols   = kwargs.get("lenCols", [])
-		if not lenCols or len(lenCols) != len(nameIndexCols):
-			for i, name in enumerate(nameIndexCols):
-				if not i:
-					lenCols.append(df[df.columns[i]].str.len().max() + offSet)
+		lenCols   = list(kwargs.get("lenCols", []))
+		nIdx      = len(nameIndexCols)
+		if len(lenCols) < df.shape[1]:
+			lenCols = lenCols[:nIdx]
+			for i in range(len(lenCols), df.shape[1]):
+				lens = df.iloc[:,i].astype(str).str.len()
+				if i < nIdx:
+					lenCols.append(colWidth(lens, len(nameIndexCols[i])) + 
+					               offSet * (not i))
 				else:
-					lenCols.append(df[df.columns[i]].str.len().max())
-				
-		for i in range(len(nameIndexCols), df.shape[1]):
-			maxLenCol = df.iloc[:,i].astype(basestring).str.len().max()
-			if maxLenCol > minColLen:
-				lenCols.append(int(maxLenCol))
-			else:
-				lenCols.append(int(minColLen))
-		headerStr = "\n "
-		for i, name in enumerate(df.columns):
-			if i < len(nameIndexCols):
-				print nameIndexCols[i], lenCols[i]
-				headerStr += "{:<{}s} ".format(nameIndexCols[i], lenCols[i]) 
-				if i < len(nameIndexCols) - 1:
-					headerStr += " "
-			else:
-				# headerStr += " " * (offSet + 1)
-				# print name, lenCols[i]
-				headerStr += "{:>{}s}".format(name, lenCols[i])
-				if i < (len(df.columns) - 1):
-					headerStr += " " * bool(offSet)
-
-		lenRow = len(headerStr)
-		# print lenRow
-		# print headerStr
-		viewStr     = "-" * lenRow + headerStr + "\n" + "-" * lenRow + "\n"
-		dfFormatter = {df.columns[i]:'{{:<{}s}}'.format(lenCol).format for i, 
-		               lenCol in enumerate(lenCols[:len(nameIndexCols)])}
-		dfStr       = df.to_string(index = False, formatters = dfFormatter)
-		viewStr    += dfStr[lenRow:] + "\n" + "-" * lenRow + "\n"
-		# return sum(lenCols)
-		return viewStr
+					lenCols.append(colWidth(lens, max(minColLen, 
+					                                  len(df.columns[i]))))
+		header = list(nameIndexCols) + list(df.columns[nIdx:])
+		return iterTable(header, df.itertuples(index = False), lenCols, nIdx)
 
 	#############################################################################
 	#                                    Diff                                   #
@@ -539,39 +897,24 @@ Parameter Manager!"
 		are two live configs, a live and pmgr config, and two pmgr configs.
 		"""
 		self._setInstanceAttrs(kwargs)
+		if kwargs.get("all", False):
+			return self._diffAll(**kwargs)
 		checkPmgr = kwargs.get("pmgr", False)
 		tooltip   = kwargs.get("tooltip", False)
 		minColLen = kwargs.get("minColLen", 14)
 		offSet    = kwargs.get("offSet", 0)
 		Pvs, IDs  = self._inferFromArgs(args)
-		self._inferFromPvs(Pvs)
-		fldMap  = self._objTypeFldMaps[self._objTypes[0]]   #Check if this is okay
-		devName = self._getValWhereTrue(self._objTypeNames, "objTypeNames",
-		                                "objType", self._objTypes[0])
+		if not Pvs:
+			if IDs:
+				raise NotImplementedError()
+			return self._writeNoMatch(args, kwargs.get("out") or stdout)
+		hutches, objTypes = self._inferFromPvs(Pvs)
+		devName = self._getObjTypeName(objTypes[0])
 		numPvs, numIDs = len(Pvs), len(IDs)
 		# Reorganize the use cases when implmenting the SN side of diff
 		if numPvs and not numIDs:
-			liveFlds = [self._getLiveFldDict(Pv, objType) for Pv, objType in 
-			            zip(Pvs, self._objTypes)]
-			if checkPmgr or numPvs == 1:
-				pmgrFlds = [self._getPmgrFldDict(Pv, objType, hutch) for Pv,
-				            objType, hutch in zip(
-					            Pvs, self._objTypes, flatten(self._hutches))]
-				maxColLen = len(max(flatten(
-					[liveFld.values() for liveFld in liveFlds] + 
-					[pmgrFld.values() for pmgrFld in pmgrFlds]), key=len)) + 1
-				if maxColLen > minColLen:
-					minColLen = maxColLen
-				diffDfs = [self._getDiffDf(
-					[Pv], [liveFld, pmgrFld], fldMap, minColLen, offSet) for 
-					Pv, liveFld, pmgrFld in zip(Pvs, liveFlds, pmgrFlds)]
-			else:
-				maxColLen = len(max(flatten(
-					[liveFld.values() for liveFld in liveFlds]), key=len)) + 1
-				if maxColLen > minColLen:
-					minColLen = maxColLen
-				diffDfs = [self._getDiffDf(Pvs, liveFlds, fldMap, minColLen, 
-				                           offSet)]
+			liveFlds, diffDfs, minColLen = self._getDiffDfs(
+				Pvs, objTypes, hutches, checkPmgr, minColLen, offSet)
 		else:
 			# Future additions:
 			# Once the search function is working, add a way to print diffs
@@ -581,151 +924,345 @@ Parameter Manager!"
 			# - Pmgr entry and the rec_base it is connected to if it exists
 			raise NotImplementedError()
 
-		paramLen, toolTipLen = [], []
-		index  = ['Parameter', 'Tooltip']
-		for diffDf in diffDfs:
-			if diffDf.shape[0] != 0:
-				paramLen.append(max(diffDf['alias'].str.len().max(), 
-				                    len(index[0])) + offSet)
-				if tooltip:
-					toolTipLen.append(max(diffDf['tooltip'].str.len().max(), 
-					                      len(index[1])))
-		if diffDf.shape[0] != 0:
-			if tooltip:
-				lenDiffCols = [max(paramLen), max(toolTipLen)]
-			else:
-				index.remove('Tooltip')
-				lenDiffCols = [max(paramLen)]
+		self._printDiffs(Pvs, liveFlds, diffDfs, devName, tooltip, minColLen, 
+		                 offSet, self._getNameLenCols(set(objTypes), tooltip, 
+		                                              offSet), kwargs.get("out"))
+		self._writeUnreachable(Pvs, kwargs.get("out") or stdout)
 
+	def _getDiffDfs(self, Pvs, objTypes, hutches, checkPmgr = False, 
+	                minColLen = 14, offSet = 0, liveFlds = None):
+		"""
+		Returns the live field dicts, the diff dfs and the value column length.
+		Each PV is diffed against its pmgr entry if checkPmgr is set or there is
+		only one PV, otherwise the PVs are diffed against each other. The live
+		fields are read unless they are passed in.
+		"""
+		fldMap   = self._objTypeFldMaps[objTypes[0]]   #Check if this is okay
+		flds     = list(self._objTypeFldSpecs[objTypes[0]].flds)
+		if liveFlds is None:
+			liveFlds = self._getLiveFldDicts(Pvs, objTypes)
+		if not (checkPmgr or len(Pvs) == 1):
+			with self._profiler.phase("diff", len(Pvs)):
+				liveMat   = fldMatrix(liveFlds, flds)
+				minColLen = max(minColLen, maxValLen(liveMat) + 1)
+				diffDfs   = [self._getDiffDf(Pvs, liveMat, anyDiffMask(liveMat),
+				                             fldMap, minColLen, offSet)]
+			return liveFlds, diffDfs, minColLen
+		with self._profiler.phase("pmgr fields", len(Pvs)):
+			pmgrFlds = [self._getPmgrFldDict(Pv, objType, hutch, liveFld) 
+			            for Pv, objType, hutch, liveFld in zip(
+				            Pvs, objTypes, hutches, liveFlds)]
+		with self._profiler.phase("diff", len(Pvs)):
+			liveMat  = fldMatrix(liveFlds, flds)
+			pmgrMat  = fldMatrix(pmgrFlds, flds)
+			diffMask = pairDiffMask(liveMat, pmgrMat)
+			minColLen = max(minColLen, maxValLen(liveMat, pmgrMat) + 1)
+			diffDfs = [self._getDiffDf(
+				[Pv], [liveMat[i], pmgrMat[i]], diffMask[i], fldMap, 
+				minColLen, offSet) for i, Pv in enumerate(Pvs)]
+		return liveFlds, diffDfs, minColLen
+
+	def _printDiffs(self, Pvs, liveFlds, diffDfs, devName, tooltip, minColLen,
+	                offSet, lenCols, out = None):
+		"""
+		Writes the diff block of each of the inputted diff dfs to out (stdout by
+		default). lenCols are the widths of the name columns (see 
+		_getNameLenCols) and minColLen sets the value columns, so every block
+		shares the same widths without looking at the rows.
+		"""
+		with self._profiler.phase("render", len(diffDfs)):
+			self._writeDiffs(Pvs, liveFlds, diffDfs, devName, tooltip, 
+			                 minColLen, offSet, lenCols, out or stdout)
+
+	def _writeDiffs(self, Pvs, liveFlds, diffDfs, devName, tooltip, minColLen,
+	                offSet, lenCols, out):
+		"""Writes the diff blocks for _printDiffs."""
+		index = ['Parameter', 'Tooltip'] if tooltip else ['Parameter']
 		for i, diffDf in enumerate(diffDfs):
 			motorDesc = liveFlds[i]["FLD_DESC"]
-			print "{0} PV: {1}".format(devName.capitalize(), Pvs[i])
-			print "{0} Description: {1}".format(devName.capitalize(), motorDesc)
-			print "Number of Diffs: {0}".format(diffDf.shape[0])
+			out.write("{0} PV: {1}\n".format(devName.capitalize(), Pvs[i]))
+			out.write("{0} Description: {1}\n".format(devName.capitalize(), 
+			                                          motorDesc))
+			out.write("Number of Diffs: {0}\n".format(diffDf.shape[0]))
 			if diffDf.shape[0] != 0:
 				if not tooltip:
 					diffDf = diffDf.drop('tooltip', 1)
-				print self._view(diffDf, index, offSet = offSet, 
-				                 minColLen = minColLen, lenCols = lenDiffCols)				
+				valLens = [minColLen - 1 + offSet] * (diffDf.shape[1] - 
+				                                      len(index))
+				writeLines(self._iterView(diffDf, index, lenCols = lenCols + 
+				                          valLens), out)
+				out.write("\n")
 
-	def _inferFromArgs(self, args):
+	def _diffAll(self, **kwargs):
+		"""
+		Diffs every device of the instance objType(s) in the instance hutch(es)
+		against the pmgr. Devices are read in bounded batches and the diffs of
+		each batch are printed as soon as it is ready, so memory use does not
+		grow with the number of devices in the hutch.
+		"""
+		tooltip   = kwargs.get("tooltip", False)
+		minColLen = kwargs.get("minColLen", 14)
+		offSet    = kwargs.get("offSet", 0)
+		batchSize = kwargs.get("batchSize", 20)
+		out       = kwargs.get("out")
+		if not self._hutches:
+			raise InvalidHutchError(self._hutches)
+		objTypes = list(self._objTypes) or list(self._allObjTypes)
+		shards   = [(hutch, objType) for hutch in flatten(self._hutches) for
+		            objType in objTypes]
+		if kwargs.get("processes", 1) > 1 and len(shards) > 1:
+			return self._diffAllSharded(shards, **kwargs)
+		for hutch, objType in shards:
+			self._printDiffBatches(objType, self._iterDiffBatches(
+				objType, hutch, batchSize, minColLen, offSet), tooltip, offSet, 
+				out)
+
+	def _printDiffBatches(self, objType, batches, tooltip, offSet, out):
+		"""
+		Prints the (Pvs, liveFlds, diffDfs, colLen) batches of the devices of
+		an objType, whether they were diffed here or in a shard worker.
+		"""
+		devName = self._getObjTypeName(objType)
+		# Size the name columns from the FieldSpecs so every batch lines up
+		# without having to see all the devices first
+		lenCols = self._getNameLenCols([objType], tooltip, offSet)
+		for Pvs, liveFlds, diffDfs, colLen in batches:
+			self._printDiffs(Pvs, liveFlds, diffDfs, devName, tooltip, colLen,
+			                 offSet, lenCols, out)
+
+	def _iterDiffBatches(self, objType, hutch, batchSize = 20, minColLen = 14,
+	                     offSet = 0):
+		"""
+		Yields the PVs, live field dicts, diff dfs against the pmgr and value
+		column length of each batch of devices of the objType in the hutch.
+		"""
+		for Pvs in chunked(self._iterHutchPvs(objType, hutch), batchSize):
+			liveFlds, diffDfs, colLen = self._getDiffDfs(
+				Pvs, [objType] * len(Pvs), [hutch] * len(Pvs), True, minColLen,
+				offSet)
+			yield Pvs, liveFlds, diffDfs, colLen
+
+	def _diffAllSharded(self, shards, **kwargs):
+		"""
+		Runs the hutch-wide diff of each (hutch, objType) shard in a process
+		pool. Every worker builds its own devconfig, and so its own pmgr handle,
+		and sends back its diff batches, which are printed exactly as _diffAll
+		prints them. Shards are printed in order, each as soon as it is done, 
+		without waiting for the rest of the pool.
+		"""
+		tooltip   = kwargs.get("tooltip", False)
+		minColLen = kwargs.get("minColLen", 14)
+		offSet    = kwargs.get("offSet", 0)
+		batchSize = kwargs.get("batchSize", 20)
+		out       = kwargs.get("out") or stdout
+		results   = []
+		pool = Pool(min(kwargs["processes"], len(shards)))
+		try:
+			for hutch, objType, batches in pool.imap(_auditShard, [
+					(hutch, objType, batchSize, minColLen, offSet, 
+					 self._initKwargs) for hutch, objType in shards]):
+				self._printDiffBatches(objType, batches, tooltip, offSet, out)
+				out.flush()
+				results.append((hutch, objType, batches))
+		finally:
+			pool.close()
+			pool.join()
+		return results
+
+	def _iterHutchPvs(self, objType, hutch):
+		"""
+		Yields the base PV of every device of the objType in the hutch, taken
+		from the rec_base of the pmgr objs and filtered by the objType keys.
+		"""
+		objs = self._getPmgr(objType, hutch).objs
+		keys = self._getObjTypeKeys(hutch, objType)
+		for objID in sorted(objs.keys()):
+			recBase = objs[objID].get('rec_base')
+			if recBase and (not keys or any(key in recBase for key in keys)):
+				yield recBase
+
+	def _inferFromArgs(self, args, scope = None):
 		"""
 		Processes a key word argument and performs any preprocessing necessary.
+		Globs are expanded within the scope (see _getCallScope), the instance
+		one if None. Numbers as wide as the last PV's number (2 digits before
+		any PV) are shorthand for another device, any other number is an ID.
 		"""
-		Pvs, IDs = [], []
+		Pvs, IDs, width = [], [], 2
 		for arg in args:
 			if isnumber(arg):
-				if len(arg) == 2:
+				if len(arg) == width:
 					# This is a bit of an assumption that IDs (SNs) will never 
-					# only be len 2.
+					# be as wide as the PV numbers.
 					Pvs.append(arg)
 				else:
 					IDs.append(str(arg))
 			else:
 				Pvs.append(arg)
-		Pvs = parsePvArguments(Pvs)
+				width = pvNumWidth(arg) or width
+		Pvs = parsePvArguments(Pvs, partial(self._iterKnownPvs, scope = scope))
 		return Pvs, IDs
 
-	def _inferFromPvs(self, Pvs):
-		if not self._hutches:
-			for Pv in Pvs:
-				hutches, _ = self._getValidHutches(Pv[:3])
-				if hutches:
-					self._hutches.append(hutches)
-				else:
-					break
-			# Porbably need to turn this into its own method
-			if len(self._hutches) != len(Pvs):
-				self._hutches = []
-				print "Could not infer hutch(es) from PV(s). Please enter hutch:"
-				for Pv in Pvs:
-					inpHutch = None
-					while not inpHutch:
-						inpHutch = input("{0} - ".format(Pv))
-						if inpHutch not in self._allHutches:
-							print "Invalid hutch entry: '{0}'".format(inpHutch)
-							inpHutch = None
-					self._hutches.append([inpHutch])
-
-		if not self._objTypes:
-			for Pv, hutch in zip(Pvs, self._hutches):
-				# Yes I am a lazy sob
-				if len(self._allObjTypes) == 1:
-					self._objTypes.append(list(self._allObjTypes)[0])
+	def _iterKnownPvs(self, pattern, scope = None):
+		"""
+		Yields the base PVs of the pmgr objs a glob pattern can match: those of
+		the hutch the pattern starts with, otherwise of the scope hutches 
+		(or every hutch if none are set).
+		"""
+		scopeHutches, scopeObjTypes, _ = scope or self._getCallScope({})
+		hutches = self._hutchTrie.longest(globRe.split(pattern)[0], ())
+		if not hutches:
+			hutches = sorted(set(flatten(scopeHutches))) or sorted(
+				self._allHutches)
+		for hutch in hutches:
+			for objType in sorted(scopeObjTypes or self._allObjTypes):
+				try:
+					for Pv in self._iterHutchPvs(objType, hutch):
+						yield Pv
+				except pmgrInitError:
+					print "Could not load the pmgr for {0} {1}, \
+skipping.".format(hutch, objType)
+
+	def _inferFromPvs(self, Pvs, scope = None):
+		"""
+		Returns lists of the hutch and objType of each of the PVs. Hutches come
+		from the hutch trie, limited to the scope hutches if any are set,
+		and objTypes from the scope objTypes (all of them if none are set),
+		picking by the objType keys if there is more than one. Every PV that 
+		could not be resolved is reported at once: in strict mode by raising 
+		UnresolvedPvError, otherwise by prompting for them. The scope is the
+		instance one if None (see _getCallScope).
+		"""
+		hutches, objTypes, strict = scope or self._getCallScope({})
+		allowed  = set(flatten(hutches))
+		objTypes = sorted(objTypes or self._allObjTypes)
+		hutchList, objTypeList, unresolved = [], [], []
+		for Pv in Pvs:
+			hutch   = self._inferHutch(Pv, allowed)
+			objType = self._inferObjType(Pv, hutch, objTypes) if hutch else None
+			if objType is None:
+				unresolved.append(Pv)
+			hutchList.append(hutch)
+			objTypeList.append(objType)
+		if unresolved:
+			if strict:
+				raise UnresolvedPvError(unresolved)
+			self._promptUnresolved(Pvs, hutchList, objTypeList, unresolved, 
+			                       allowed, objTypes)
+		return hutchList, objTypeList
+
+	def _inferHutch(self, Pv, allowed = None):
+		"""
+		Returns the hutch of the PV using the hutch trie, or None if it could
+		not be resolved to a single hutch in allowed (if given). A PV the trie
+		knows nothing about is put in the allowed hutch if there is only one,
+		but one whose prefix names a hutch outside allowed is left unresolved.
+		"""
+		hutches = self._hutchTrie.longest(Pv, ())
+		if allowed:
+			if not hutches and len(allowed) == 1:
+				return list(allowed)[0]
+			hutches = [hutch for hutch in hutches if hutch in allowed]
+		return hutches[0] if len(hutches) == 1 else None
+
+	def _inferObjType(self, Pv, hutch, objTypes):
+		"""
+		Returns the objType of the PV in the hutch, the only candidate objType
+		or the first whose keys are found in the PV, or None.
+		"""
+		if len(objTypes) == 1:
+			return objTypes[0]
+		for objType in objTypes:
+			keys = self._getObjTypeKeys(hutch, objType)
+			if keys and any(key in Pv for key in keys):
+				return objType
+		return None
+
+	def _promptUnresolved(self, Pvs, hutchList, objTypeList, unresolved, 
+	                      allowed, objTypes):
+		"""
+		Lists all the unresolved PVs and then asks for the hutch of each of 
+		them, and their objType if it can not be inferred, filling in the
+		hutch and objType lists.
+		"""
+		print "Could not infer the hutch or objType of {0} PV(s): {1}".format(
+			len(unresolved), ", ".join(unresolved))
+		unresolved = set(unresolved)
+		for i, Pv in enumerate(Pvs):
+			if Pv not in unresolved:
+				continue
+			while hutchList[i] is None:
+				hutchList[i] = self._inferHutch(raw_input(
+					"{0} hutch - ".format(Pv)), allowed)
+				if hutchList[i] is None:
+					print "Invalid hutch entry."
+			objTypeList[i] = self._inferObjType(Pv, hutchList[i], objTypes)
+			while objTypeList[i] is None:
+				objType = raw_input("{0} objType - ".format(Pv)).lower()
+				if objType in objTypes:
+					objTypeList[i] = objType
 				else:
-					# Fill this in at some point
-					raise NotImplementedError()
+					print "Invalid objType entry: '{0}'".format(objType)
 
-	def _getDiffDf(self, Pvs, fldDicts, fldMap, minValColLen = 10, offSet = 0):
+	def _getDiffDf(self, Pvs, valRows, diffMask, fldMap, minValColLen = 10, 
+	               offSet = 0):
 		"""
 		Returns a df with the alias, tooltip and values of the different fields.
+		valRows are rows of a diffEngine field matrix and diffMask marks the
+		fields that differ.
 		"""
-		idxDiffs  = self._getDiffFlds(fldDicts)
-		diffDicts = [{i:fldDict[i] for i in idxDiffs} for fldDict in fldDicts]
-		diffDf    = fldMap.loc[idxDiffs][['alias', 'tooltip']].reset_index()
-		nPvs, nDiffDicts = len(Pvs), len(diffDicts)
-		if nPvs != nDiffDicts:
-			for Pv in Pvs:
-				Pvs.append("Pmgr")
-				if len(Pvs) == nDiffDicts:
-					break
+		diffDf = fldMap[diffMask][['alias', 'tooltip']].reset_index(drop=True)
+		nPvs, nRows = len(Pvs), len(valRows)
+		if nPvs < nRows:
+			Pvs = list(Pvs) + ["Pmgr"] * (nRows - nPvs)
 		Pvs = [Pv.rjust(minValColLen - 1 + offSet, "-") for Pv in Pvs]
-		for Pv, diffDict in zip(Pvs, diffDicts):
-			diffDf[Pv] = diffDf['index'].map(diffDict)
-		diffDf = diffDf.drop('index', 1)
+		for Pv, valRow in zip(Pvs, valRows):
+			diffDf[Pv] = valRow[diffMask]
 		return diffDf
 
-	def _getDiffFlds(self, fldDicts):
-		"""Returns the names of the fields that are different."""
-		diffFlds = []
-		for fld in fldDicts[0].keys():
-			val = fldDicts[0][fld]
-			for fldDict in islice(fldDicts, 1, len(fldDicts)):
-				if fldDict[fld] != val and fld not in diffFlds:
-					diffFlds.append(fld)
-		diffFlds.sort()
-		return diffFlds
-		
-	def _getPmgrFldDict(self, Pv, objType, hutch):
+	def _getPmgrFldDict(self, Pv, objType, hutch, liveFld = None):
 		"""
 		Returns a dictionary of values for the pmgr entry of the inputted device 
-		Pv.
-		"""
-		self._pmgr = self._getPmgr(objType, hutch)
-		self._pmgr.updateTables()
-		fldMap = self._objTypeFldMaps[objType]
-		fldID  = self._getValWhereTrue(self._objTypeIDs, 'objTypeIDs', 
-		                               'objType', objType)
-		PvExt  = fldMap.pv[fldID]
-		try:
-			devID  = str(get(Pv + PvExt))
-		except pyexc:
+		Pv. The device ID is taken from liveFld if the live fields have already
+		been read, otherwise it is read from the device.
+		"""
+		pmgr   = self._getPmgr(objType, hutch)
+		self._pmgr = pmgr
+		fldID  = self._getObjTypeID(objType)
+		PvExt  = self._objTypeFldSpecs[objType][fldID].pv
+		if liveFld is not None and liveFld.get(fldID) != "NO CON":
+			devID = liveFld[fldID]
+		else:
+			devID = self._liveReader.read([Pv + PvExt], devices={
+				Pv + PvExt : Pv})[Pv + PvExt]
+		if devID is None:
 			print "Could not connect to '{0}'.".format(Pv + PvExt)
 			return None
+		devID  = str(devID)
 		try:
-			objID  = self._getPmgrObjFromDevID(devID, fldID)
+			objID  = self._getPmgrObjFromDevID(devID, objType, hutch)
 		except pmgrKeyError:
 			print "Key {0} for {1} not found in the pmgr.".format(devID, Pv)
 			return None
-		return self._getObjFldDict(objID, objType)
+		return self._getObjFldDict(objID, objType, pmgr)
 
-	def _getPmgrObjFromDevID(self, devID, fldID):
-		"""Returns the id of the object whose fldID matches the devID."""
-		for objID in self._pmgr.objs.keys():
-		    if devID == self._pmgr.objs[objID][fldID]:
-			    return objID
-		raise pmgrKeyError(devID)
+	def _getPmgrObjFromDevID(self, devID, objType, hutch):
+		"""Returns the id of the object whose ID field matches the devID."""
+		objID = self._getObjWithID(devID, objType, hutch)
+		if objID is None:
+			raise pmgrKeyError(devID)
+		return objID
 
-	def _getObjFldDict(self, objID, objType):
+	def _getObjFldDict(self, objID, objType, pmgr = None):
 		"""Returns the field dictionary of the object given the object ID."""
-		pmgrObj = self._pmgr.objs[objID]
+		pmgr    = pmgr or self._pmgr
+		pmgrObj = pmgr.objs[objID]
 		# Find out what exception gets raised if there is an invalid config
 		# -----------------------------------------------------------------
-		pmgrCfg = self._pmgr.cfgs[pmgrObj['config']]
+		pmgrCfg = pmgr.cfgs[pmgrObj['config']]
 		# -----------------------------------------------------------------
 		fldDict = {}
-		fldMap  = self._objTypeFldMaps[objType]
-		for fld in fldMap.index:
+		for fld in self._objTypeFldSpecs[objType].flds:
 			try:
 				fldDict[fld] = str(pmgrCfg[fld])
 			except KeyError:
@@ -733,6 +1270,73 @@ Parameter Manager!"
 		return fldDict
 		
 
+	#############################################################################
+	#                                   Async                                   #
+	#############################################################################
+
+	def asyncDiff(self, *args, **kwargs):
+		"""
+		Non-blocking counterpart of Diff. Returns a concurrent.futures Future
+		whose result is the list of diff dfs instead of printing them: one per
+		PV when diffing against the pmgr, otherwise a single df across the PVs.
+		The live fields and the pmgr tables are fetched concurrently. The
+		hutches and objTypes kw arguments only apply to this call and PVs that
+		cannot be resolved fail the Future, as nobody is there to prompt.
+		"""
+		checkPmgr = kwargs.get("pmgr", False)
+		minColLen = kwargs.get("minColLen", 14)
+		offSet    = kwargs.get("offSet", 0)
+		def asyncDiff():
+			Pvs, objTypes, hutches = self._inferAsync(args, kwargs)
+			pmgr     = checkPmgr or len(Pvs) == 1
+			liveFlds = self._fetchConcurrently(Pvs, objTypes, hutches, pmgr)
+			return self._getDiffDfs(Pvs, objTypes, hutches, pmgr, minColLen,
+			                        offSet, liveFlds)[1]
+		return submit(asyncDiff)
+
+	def asyncView(self, *args, **kwargs):
+		"""
+		Non-blocking counterpart of view. Returns a concurrent.futures Future
+		whose result is the list of view dfs of the inputted PVs. The live 
+		fields and the pmgr tables are fetched concurrently, with the same kw
+		argument handling as asyncDiff.
+		"""
+		summary = kwargs.get("summary", False)
+		def asyncView():
+			Pvs, objTypes, hutches = self._inferAsync(args, kwargs)
+			liveFlds = self._fetchConcurrently(Pvs, objTypes, hutches)
+			return self._getViewDfs(Pvs, objTypes, hutches, summary, liveFlds)
+		return submit(asyncView)
+
+	def _inferAsync(self, args, kwargs):
+		"""
+		Returns the PVs of the arguments of an async call and their objTypes
+		and hutches, resolved strictly within the scope of the call's kw 
+		arguments without touching the instance attributes.
+		"""
+		scope    = self._getCallScope(dict(kwargs, strict = True))
+		Pvs, IDs = self._inferFromArgs(args, scope)
+		if IDs:
+			raise NotImplementedError()
+		if not Pvs:
+			raise ValueError("No PVs matched '{0}'.".format(" ".join(
+				str(arg) for arg in args)))
+		hutches, objTypes = self._inferFromPvs(Pvs, scope)
+		return Pvs, objTypes, hutches
+
+	def _fetchConcurrently(self, Pvs, objTypes, hutches, pmgr = True):
+		"""
+		Reads the live fields of the PVs while the pmgr handles they need are
+		loaded in parallel. Returns the live field dicts.
+		"""
+		pmgrLoads = []
+		if pmgr:
+			pmgrLoads = [submitLoad(self._getPmgr, objType, hutch) for objType,
+			             hutch in set(zip(objTypes, hutches))]
+		liveFlds = self._getLiveFldDicts(Pvs, objTypes)
+		gather(pmgrLoads)
+		return liveFlds
+
 	#############################################################################
 	#                                    New                                    #
 	#############################################################################
@@ -752,15 +1356,384 @@ Parameter Manager!"
 	#                                    Save                                   #
 	#############################################################################
 
-	def save(self):
-		raise NotImplementedError()
+	def save(self, *args, **kwargs):
+		"""
+		Saves the live fields of the inputted devices to their pmgr obj and cfg
+		entries. The fields of all the devices are read in one batch and the
+		changes to each pmgr are committed in a single transaction. Prints and
+		returns the save records, one per device.
+		"""
+		self._setInstanceAttrs(kwargs)
+		out      = kwargs.get("out") or stdout
+		Pvs, IDs = self._inferFromArgs(args)
+		if IDs:
+			raise NotImplementedError()
+		if not Pvs:
+			self._writeNoMatch(args, out)
+			return []
+		hutches, objTypes = self._inferFromPvs(Pvs)
+		liveFlds = self._getLiveFldDicts(Pvs, objTypes)
+		records  = [{"Pv":Pv, "status":"Skipped", "objFlds":0, "cfgFlds":0} 
+		            for Pv in Pvs]
+		devices  = {}
+		for i, (objType, hutch) in enumerate(zip(objTypes, hutches)):
+			devices.setdefault((objType, hutch), []).append(i)
+		start = time.time()
+		with self._profiler.phase("save", len(Pvs)):
+			for (objType, hutch), idxs in sorted(devices.items()):
+				self._savePmgr(objType, hutch, [Pvs[i] for i in idxs], 
+				               [liveFlds[i] for i in idxs], 
+				               [records[i] for i in idxs])
+		self._printSave(records, time.time() - start, out)
+		self._writeUnreachable(Pvs, out)
+		return records
+
+	def _savePmgr(self, objType, hutch, Pvs, liveFlds, records):
+		"""
+		Writes the live fields of the devices to the objType and hutch pmgr in
+		one transaction, filling in the save records. Fields are saved to the
+		obj if their field map obj flag is set and to the cfg otherwise, and 
+		only the writable fields that differ from the pmgr are sent, converted
+		to their field map type. Devices sharing a cfg whose fields disagree
+		are not saved, as only one of them could win.
+		"""
+		pmgr     = self._getPmgr(objType, hutch)
+		objs     = pmgr.objs
+		cfgs     = pmgr.cfgs
+		fldSpecs = self._objTypeFldSpecs[objType]
+		fldID    = self._getObjTypeID(objType)
+		changes  = []
+		for Pv, liveFld, record in zip(Pvs, liveFlds, records):
+			if liveFld[fldID] == "NO CON":
+				print "Could not read the ID of {0}. Skipping.".format(Pv)
+				continue
+			objID = self._getObjWithID(liveFld[fldID], objType, hutch)
+			if objID is None:
+				print "No pmgr entry found for {0}. Skipping.".format(Pv)
+				continue
+			pmgrObj = objs[objID]
+			cfgID   = pmgrObj["config"]
+			pmgrCfg = cfgs[cfgID]
+			objChange, cfgChange = {}, {}
+			for spec in fldSpecs:
+				val = liveFld[spec.fld]
+				if spec.readonly or val == "NO CON":
+					continue
+				try:
+					val = pmgrValue(val, spec.type, spec.enum)
+				except ValueError:
+					print "Invalid live value '{0}' for {1} of {2}. \
+Skipping.".format(val, spec.fld, Pv)
+					continue
+				pmgrRow = pmgrObj if spec.obj else pmgrCfg
+				try:
+					if pmgrValue(pmgrRow.get(spec.fld), spec.type, 
+					             spec.enum) == val:
+						continue
+				except (ValueError, TypeError):
+					pass
+				if spec.obj:
+					objChange[spec.fld] = val
+				else:
+					cfgChange[spec.fld] = val
+			record["objFlds"], record["cfgFlds"] = len(objChange), len(cfgChange)
+			record["status"] = "Saved" if objChange or cfgChange else \
+			    "No changes"
+			changes.append((objID, objChange, cfgID, cfgChange, record))
+		changes = self._dropCfgConflicts(changes)
+		if not any(objChange or cfgChange for _, objChange, _, cfgChange, _ in 
+		           changes):
+			return
+		pmgr.start_transaction()
+		cfgsSent = set()
+		for objID, objChange, cfgID, cfgChange, _ in changes:
+			if objChange:
+				pmgr.objectChange(objID, objChange)
+			if cfgChange and cfgID not in cfgsSent:
+				pmgr.configChange(cfgID, cfgChange)
+				cfgsSent.add(cfgID)
+		errors = pmgr.end_transaction()
+		if errors:
+			print "Pmgr transaction for {0} {1} failed:".format(hutch, objType)
+			for error in errors:
+				print "  {0}".format(error)
+			for record in records:
+				if record["status"] == "Saved":
+					record["status"] = "Failed"
+			return
+		self._pmgrPool.sync(objType, hutch)
+
+	def _dropCfgConflicts(self, changes):
+		"""
+		Returns the (objID, objChange, cfgID, cfgChange, record) changes 
+		without the devices that share a cfg but would change it differently,
+		marking their records as cfg conflicts. Devices sharing a cfg with the
+		same changes are kept, the cfg is only changed once.
+		"""
+		byCfg = {}
+		for change in changes:
+			byCfg.setdefault(change[2], []).append(change)
+		conflicts = set()
+		for cfgID, cfgChanges in byCfg.iteritems():
+			if len(set(tuple(sorted(change[3].items())) for change in 
+			           cfgChanges)) > 1:
+				print "Devices {0} share cfg {1} but their fields differ. \
+Not saving them.".format(", ".join(change[4]["Pv"] for change in cfgChanges),
+				                         cfgID)
+				conflicts.add(cfgID)
+		for change in changes:
+			if change[2] in conflicts:
+				change[4]["status"] = "Cfg conflict"
+		return [change for change in changes if change[2] not in conflicts]
+
+	def _printSave(self, records, seconds, out):
+		"""Writes the table of save records and a summary line to out."""
+		header = ["PV", "Status", "Obj Fields", "Cfg Fields"]
+		rows   = [[record["Pv"], record["status"], str(record["objFlds"]), 
+		           str(record["cfgFlds"])] for record in records]
+		widths = [colWidth((len(row[i]) for row in rows), len(name)) for 
+		          i, name in enumerate(header)]
+		writeLines(iterTable(header, rows, widths, 2), out)
+		nSaved = sum(1 for record in records if record["status"] in 
+		             ("Saved", "No changes"))
+		out.write("Saved {0} of {1} device(s) in {2:.3f} s.\n".format(
+			nSaved, len(records), seconds))
 
 	#############################################################################
 	#                                   Apply                                   #
 	#############################################################################
 
-	def apply(self):
-		raise NotImplementedError()
+	def apply(self, *args, **kwargs):
+		"""
+		Writes the pmgr configs of the inputted devices to the live devices and
+		prints the time taken and any failures for each device. Fields of a 
+		device are written in setorder, while separate devices are written in
+		parallel, at most maxConcurrent at a time. Returns the list of apply
+		records, one per device.
+		"""
+		self._setInstanceAttrs(kwargs)
+		maxConcurrent = kwargs.get("maxConcurrent", 8)
+		timeout       = kwargs.get("timeout")
+		out           = kwargs.get("out") or stdout
+		Pvs, IDs = self._inferFromArgs(args)
+		if IDs:
+			raise NotImplementedError()
+		if not Pvs:
+			self._writeNoMatch(args, out)
+			return []
+		hutches, objTypes = self._inferFromPvs(Pvs)
+		liveFlds = self._getLiveFldDicts(Pvs, objTypes)
+		with self._profiler.phase("pmgr fields", len(Pvs)):
+			pmgrFlds = [self._getPmgrFldDict(Pv, objType, hutch, liveFld) 
+			            for Pv, objType, hutch, liveFld in zip(
+				            Pvs, objTypes, hutches, liveFlds)]
+		with self._profiler.phase("apply plan", len(Pvs)):
+			plans = [None if pmgrFld is None else self._getApplyPlan(
+				Pv, objType, liveFld, pmgrFld) for Pv, objType, liveFld, pmgrFld
+			         in zip(Pvs, objTypes, liveFlds, pmgrFlds)]
+		start = time.time()
+		with self._profiler.phase("apply", len(Pvs)):
+			records = self._applyPlans(Pvs, plans, maxConcurrent, timeout)
+		self._printApply(records, time.time() - start, out)
+		self._writeUnreachable(Pvs, out)
+		return records
+
+	def _getApplyPlan(self, Pv, objType, liveFld, pmgrFld):
+		"""
+		Returns the writes needed to bring the device to its pmgr values as a
+		list of steps, each a list of (channel, value) pairs that can be sent 
+		together. The field map sets how the fields are written:
+		- readonly fields are never written
+		- fields are only written if their value differs from the live one, 
+		  unless they are mustwrite
+		- only one field of each mutex group is written, as the IOC works out
+		  the others from it. The first differing field in setorder wins
+		- steps go in increasing setorder, the fields sharing a setorder are
+		  written together and the setmutex ones then one at a time
+		- writezero fields have 0 written to them just before their value
+		"""
+		specs   = sorted(zip(self._objTypeFldSpecs[objType], 
+		                     self._getDeviceChans(Pv, objType)), 
+		                 key=lambda item: (item[0].setorder, item[0].colorder))
+		claimed = set()
+		steps   = []
+		for _, group in groupby(specs, lambda item: item[0].setorder):
+			zeros, vals, serial = [], [], []
+			for spec, chan in group:
+				val = pmgrFld.get(spec.fld)
+				if spec.readonly or val in (None, "None", ""):
+					continue
+				try:
+					val = caValue(val, spec.type, spec.enum)
+				except ValueError:
+					print "Invalid pmgr value '{0}' for {1}. Skipping.".format(
+						val, chan)
+					continue
+				if not spec.mustwrite:
+					try:
+						if val == caValue(liveFld.get(spec.fld), spec.type, 
+						                  spec.enum):
+							continue
+					except (ValueError, TypeError):
+						pass
+				if claimed.intersection(spec.mutex):
+					continue
+				claimed.update(spec.mutex)
+				if spec.setmutex:
+					if spec.writezero:
+						serial.append([(chan, 0)])
+					serial.append([(chan, val)])
+				else:
+					if spec.writezero:
+						zeros.append((chan, 0))
+					vals.append((chan, val))
+			steps += [step for step in (zeros, vals) if step] + serial
+		return steps
+
+	def _applyPlans(self, Pvs, plans, maxConcurrent = 8, timeout = None):
+		"""
+		Runs the apply plan of each device, with up to maxConcurrent devices 
+		being written at the same time. Returns the apply records in order.
+		"""
+		pool = ThreadPool(max(1, min(maxConcurrent, len(Pvs))))
+		try:
+			return pool.map(lambda args: self._applyPlan(*args, 
+			                                             timeout = timeout),
+			                zip(Pvs, plans))
+		finally:
+			pool.close()
+			pool.join()
+
+	def _applyPlan(self, Pv, plan, timeout = None):
+		"""
+		Writes the steps of the plan to the device in order, stopping at the
+		first step that fails. Devices without a plan (not connected or not in
+		the pmgr) are skipped. Returns a dictionary with the PV, status, number
+		of writes, seconds taken and channels that failed.
+		"""
+		record = {"Pv":Pv, "status":"Applied", "writes":0, "seconds":0.0, 
+		          "failed":[]}
+		if plan is None:
+			record["status"] = "Skipped"
+			return record
+		start = time.time()
+		for step in plan:
+			written = self._liveWriter.write(step, timeout)
+			record["writes"] += sum(1 for chan, _ in step if written[chan])
+			if isinstance(self._liveReader, MonitorCache):
+				self._liveReader.discard(written.keys())
+			record["failed"] = [chan for chan in sorted(written) if not 
+			                    written[chan]]
+			if record["failed"]:
+				record["status"] = "Failed"
+				break
+		else:
+			if not plan:
+				record["status"] = "No changes"
+		record["seconds"] = time.time() - start
+		return record
+
+	def _printApply(self, records, seconds, out):
+		"""Writes the table of apply records and a summary line to out."""
+		header = ["PV", "Status", "Writes", "Time (ms)", "Failed Channels"]
+		rows   = [[record["Pv"], record["status"], str(record["writes"]), 
+		           "{0:.1f}".format(record["seconds"] * 1e3), 
+		           ", ".join(record["failed"])] for record in records]
+		widths = [colWidth((len(row[i]) for row in rows), len(name)) for 
+		          i, name in enumerate(header)]
+		writeLines(iterTable(header, rows, widths, 2), out)
+		nApplied = sum(1 for record in records if record["status"] in 
+		               ("Applied", "No changes"))
+		out.write("Applied {0} of {1} device(s) in {2:.3f} s.\n".format(
+			nApplied, len(records), seconds))
+
+	#############################################################################
+	#                                  Snapshot                                 #
+	#############################################################################
+
+	def snapshot(self, *args, **kwargs):
+		"""
+		Reads the live fields of the inputted devices in one batch and writes
+		them to a columnar snapshot file. The file is written to the path kwarg
+		if given, otherwise to a timestamped file in the current directory.
+		Returns the path of the snapshot.
+		"""
+		self._setInstanceAttrs(kwargs)
+		Pvs, IDs = self._inferFromArgs(args)
+		if IDs:
+			raise NotImplementedError()
+		if not Pvs:
+			return self._writeNoMatch(args, kwargs.get("out") or stdout)
+		hutches, objTypes = self._inferFromPvs(Pvs)
+		objType  = objTypes[0]
+		fldSpecs = self._objTypeFldSpecs[objType]
+		liveFlds = self._getLiveFldDicts(Pvs, [objType] * len(Pvs))
+		snapPath = kwargs.get("path") or "{0}_{1}.snap".format(
+			objType, time.strftime("%Y%m%d_%H%M%S"))
+		with self._profiler.phase("snapshot write", len(Pvs)):
+			writeSnapshot(snapPath, objType, Pvs, hutches, 
+			              liveFlds, [(spec.fld, spec.type, spec.enum) for spec 
+			                         in fldSpecs])
+		return snapPath
+
+	def diffSnapshot(self, snapPath, otherPath = None, **kwargs):
+		"""
+		Prints the diffs between the devices of a snapshot and their pmgr 
+		entries, or between two snapshots if otherPath is given. Only the 
+		devices with diffs are printed when comparing two snapshots. Neither
+		needs live access to the devices.
+		"""
+		tooltip   = kwargs.get("tooltip", False)
+		minColLen = kwargs.get("minColLen", 14)
+		offSet    = kwargs.get("offSet", 0)
+		out       = kwargs.get("out") or stdout
+		with self._profiler.phase("snapshot load"):
+			snap = snapshot(snapPath)
+		fldMap  = self._objTypeFldMaps[snap.objType]
+		devName = self._getObjTypeName(snap.objType)
+		flds    = list(self._objTypeFldSpecs[snap.objType].flds)
+		if otherPath is None:
+			fldID = self._getObjTypeID(snap.objType)
+			Pvs, hutches, liveFlds = [], [], []
+			for Pv, hutch in zip(snap.Pvs, snap.hutches):
+				liveFld = snap.fldDict(Pv)
+				if liveFld.get(fldID, "NO CON") == "NO CON":
+					print "No device ID saved for {0}. Skipping.".format(Pv)
+					continue
+				Pvs.append(Pv)
+				hutches.append(hutch)
+				liveFlds.append(liveFld)
+			if not Pvs:
+				return
+			liveFlds, diffDfs, minColLen = self._getDiffDfs(
+				Pvs, [snap.objType] * len(Pvs), hutches, True, minColLen, 
+				offSet, liveFlds)
+			return self._printDiffs(Pvs, liveFlds, diffDfs, devName, tooltip,
+			                        minColLen, offSet, self._getNameLenCols(
+				                        [snap.objType], tooltip, offSet), out)
+		with self._profiler.phase("snapshot load"):
+			other = snapshot(otherPath)
+		with self._profiler.phase("snapshot diff", len(snap)):
+			Pvs, diffMask = diffSnapshots(snap, other, flds)
+		diffRows  = np.flatnonzero(diffMask.any(axis = 1))
+		diffPvs   = [Pvs[i] for i in diffRows]
+		out.write("{0} of {1} device(s) differ.\n".format(len(diffPvs), 
+		                                                  len(Pvs)))
+		if not diffPvs:
+			return
+		names     = [path.basename(snapPath), path.basename(otherPath)]
+		liveFlds  = [snap.fldDict(Pv) for Pv in diffPvs]
+		otherFlds = [other.fldDict(Pv) for Pv in diffPvs]
+		liveMat   = fldMatrix(liveFlds, flds)
+		otherMat  = fldMatrix(otherFlds, flds)
+		minColLen = max(minColLen, maxValLen(liveMat, otherMat) + 1,
+		                max(len(name) for name in names) + 1)
+		diffDfs   = [self._getDiffDf(names, [liveMat[i], otherMat[i]], 
+		                             diffMask[row], fldMap, minColLen, offSet) 
+		             for i, row in enumerate(diffRows)]
+		self._printDiffs(diffPvs, liveFlds, diffDfs, devName, tooltip, 
+		                 minColLen, offSet, self._getNameLenCols(
+			                 [snap.objType], tooltip, offSet), out)
 
 	#############################################################################
 	#                                   Revert                                  #
@@ -769,15 +1742,90 @@ Parameter Manager!"
 	def revert(self):
 		raise NotImplementedError()
 
+	#############################################################################
+	#                                   Stats                                   #
+	#############################################################################
+
+	def stats(self):
+		"""
+		Returns a dictionary of the per-phase timings (only filled in when the
+		instance was created with profile=True) along with the metadata cache 
+		and live cache counters, and the number of out of range enum indices 
+		read per (objType, field). negCache holds the channel reads skipped 
+		and the (kind, key, seconds left, failures) of the unreachable devices
+		and IOCs, and pmgrPool the pmgr table loads and incremental syncs.
+		"""
+		stats = {"phases"    : self._profiler.stats(),
+		         "metaCache" : {"hits"   : self._metaCache.hits,
+		                        "misses" : self._metaCache.misses}}
+		if isinstance(self._liveReader, MonitorCache):
+			stats["liveCache"] = self._liveReader.stats()
+		stats["pmgrPool"] = self._pmgrPool.stats()
+		if self._negCache is not None:
+			stats["negCache"] = {"skipped" : self._negCache.skipped,
+			                     "entries" : self._negCache.entries()}
+		stats["enumMismatches"] = dict(self._enumMismatches)
+		return stats
+
+	def _writeNoMatch(self, args, out):
+		"""
+		Writes that the inputted arguments did not match any PVs, e.g. a glob
+		with no matches or only invalid arguments.
+		"""
+		out.write("No PVs matched '{0}'.\n".format(" ".join(str(arg) for arg 
+		                                                    in args)))
+
+	def _writeUnreachable(self, Pvs, out):
+		"""
+		Writes the devices of the run, and the IOCs they are on, that are in 
+		the negative cache along with when they will be tried again. Nothing is
+		written if they are all reachable.
+		"""
+		if self._negCache is None:
+			return
+		keys = set(("device", Pv) for Pv in Pvs)
+		keys.update(("ioc", self._negCache.host(Pv)) for Pv in Pvs)
+		entries = [entry for entry in self._negCache.entries() if 
+		           entry[:2] in keys]
+		if not entries:
+			return
+		header = ["Unreachable", "Kind", "Failures", "Retry In (s)"]
+		rows   = [[key, kind, str(failures), "{0:.1f}".format(secondsLeft)] 
+		          for kind, key, secondsLeft, failures in entries]
+		widths = [colWidth((len(row[i]) for row in rows), len(name)) for 
+		          i, name in enumerate(header)]
+		writeLines(iterTable(header, rows, widths, 2), out)
+		out.write("Skipped {0} channel read(s) of unreachable devices.\n".format(
+			self._negCache.skipped))
+
 	#############################################################################
 	#                                   Refresh                                 #
 	#############################################################################
 
 	def refresh(self, mode = None):
-		"""Reinitializes the metadata using the pmgr or the csv."""
-		self._setMode(local)
+		"""
+		Reinitializes the metadata using the pmgr or the csv and drops all the
+		pooled pmgr handles so their tables are reloaded on next use.
+		"""
+		self._setMode(mode)
+		self._pmgrPool.invalidate()
 		self._setAttrs()
 
+	def warm(self):
+		"""
+		Loads everything a long running instance reuses between calls: the
+		pmgr tables of the instance hutches and objTypes (all of them if none 
+		are set), their device ID indexes and the search index. Pmgrs that 
+		cannot be loaded are skipped. Returns the number of pmgrs loaded.
+		"""
+		hutches  = sorted(set(flatten(self._hutches))) or sorted(self._allHutches)
+		objTypes = sorted(self._objTypes) or sorted(self._allObjTypes)
+		pmgrs    = self._updateSearchIndex(hutches, objTypes)
+		with self._profiler.phase("obj index", len(pmgrs)):
+			for hutch, objType in pmgrs:
+				self._getObjIndex(objType, hutch)
+		return len(pmgrs)
+
 	#############################################################################
 	#                                    Pmgr                                   #
 	#############################################################################
@@ -1039,6 +2087,16 @@ def isiterable(obj):
 	else:
 		return isinstance(obj, Iterable)
 
+def isInteractive():
+	"""
+	Returns True if stdin is an open terminal. stdin can be closed or missing,
+	e.g. in process pool workers, under cron or when daemonized.
+	"""
+	try:
+		return sys.stdin is not None and sys.stdin.isatty()
+	except (ValueError, AttributeError):
+		return False
+
 def isnumber(obj):
 	"""Checks if the input is a number."""
 	if isinstance(obj, basestring):
@@ -1069,61 +2127,261 @@ def isempty(seq):
 	"""Checks if an iterable (nested or not) is empty."""
 	return not any(1 for _ in flatIter(seq))
 
-def parsePvArguments(PvArguments):
+def newPmgr(objType, hutch):
+	"""
+	Returns a new pmgrobj for the objType and hutch. The pmgr is only imported
+	here so that local-mode use and option parsing never have to load it.
+	pmgrobj has no query for changed rows, so the pool syncs it by reloading
+	its tables and merging them.
+	"""
+	from pmgr.pmgrobj import pmgrobj
+	return pmgrobj(objType, hutch)
+
+pmgrSumRows = (("Pmgr Entry", "Is this device in pmgr"),   #View summary rows
+               ("  Obj Name", "Pmgr object name"),
+               ("  Cfg Name", "Pmgr config name"),
+               ("  Last Modified", "Date of last entry modification"))
+
+def pmgrValue(val, fldType, enum = None):
+	"""
+	Converts a live or pmgr field value to the form it is saved to the pmgr
+	in: the enum string for enum fields, otherwise the python type named in
+	the field map. Raises ValueError if the value can not be converted.
+	"""
+	if enum:
+		if val in enum:
+			return val
+		try:
+			return enum[int(val)]
+		except IndexError:
+			raise ValueError("No enum string {0}".format(val))
+	if fldType == "<type 'float'>":
+		return float(val)
+	elif fldType == "<type 'int'>":
+		return int(float(val))
+	return str(val)
+
+def caValue(val, fldType, enum = None):
+	"""
+	Converts a pmgr field value (stored as a string) to the value written to
+	its channel: the index for enum fields, otherwise the python type named in
+	the field map. Raises ValueError if the value can not be converted.
 	"""
-	Parses PV input arguments and returns a set of motor PVs that will have
-	the pmgrUtil functions applied to.
+	if enum:
+		try:
+			return list(enum).index(val)
+		except ValueError:
+			return int(val)
+	if fldType == "<type 'float'>":
+		return float(val)
+	elif fldType == "<type 'int'>":
+		return int(float(val))
+	return str(val)
+
+def chunked(inpIter, size):
+	"""Yields lists of up to size consecutive values from the iterable."""
+	inpIter = iter(inpIter)
+	chunk = list(islice(inpIter, size))
+	while chunk:
+		yield chunk
+		chunk = list(islice(inpIter, size))
+
+pvNumRe    = re.compile(r"^(?P<base>.*:)(?P<start>\d+)(?:-(?P<end>\d+))?$")
+shortNumRe = re.compile(r"^(?P<start>\d+)(?:-(?P<end>\d+))?$")
+braceRe    = re.compile(r"\{([^{}]*)\}")
+braceSeqRe = re.compile(r"^(\d+)\.\.(\d+)$")
+globRe     = re.compile(r"[*?[]")
+
+def parsePvArguments(PvArguments, knownPvs = None):
+	"""
+	Parses PV input arguments and returns a list of motor PVs that will have
+	the pmgrUtil functions applied to. See iterPvArguments for the accepted
+	forms. The commands pass over the PVs several times (resolving, reading 
+	and rendering them) so they are collected here, once, into the only list
+	built. Use iterPvArguments directly to process them one at a time.
 	"""
 	if len(PvArguments) == 0: return None
-	fullPvs = []
-	basePv = ''
+	return list(iterPvArguments(PvArguments, knownPvs))
+
+def iterPvArguments(PvArguments, knownPvs = None):
+	"""
+	Yields the PVs of the inputted PV arguments one at a time. Accepted forms:
+	- Full PVs:              XPP:MMS:01
+	- Ranges of any width:   XPP:MMS:0001-0120
+	- Shorthand numbers or ranges after a PV, padded to its width: 05 07-09
+	- Brace expansions:      XPP:MMS:{01,05,10..12}, XPP:{MMS,CLZ}:01
+	- Glob patterns:         XPP:MMS:0*, matched against knownPvs(pattern)
+	- PV lists:              @fileName, or - for stdin, with one or more
+	                         arguments per line and # comments
+	"""
+	state = {"base":"", "width":2}
 	for arg in PvArguments:
-		if getBasePv(arg):
-			basePv = getBasePv(arg)
-		if '-' in arg:
-			splitArgs = arg.split('-')
-			if getBasePv(splitArgs[0]) == basePv: 
-				fullPvs.append(splitArgs[0])
-			start = int(splitArgs[0][-2:])
-			end = int(splitArgs[1])
-			for i in range(start+1, end+1):
-				fullPvs.append(basePv + "{:02}".format(i))
-		elif basePv == getBasePv(arg):
-			fullPvs.append(arg)
-		elif len(arg) < 3:
-			fullPvs.append(basePv + "{:02}".format(int(arg)))
-		else:
+		for Pv in _iterPvArgument(arg, state, knownPvs):
+			yield Pv
+
+def _iterPvArgument(arg, state, knownPvs):
+	"""Yields the PVs of a single argument, updating the base PV state."""
+	if isArgFile(arg):
+		for Pv in iterPvArguments(iterArgLines(arg), knownPvs):
+			yield Pv
+		return
+	brace = braceRe.search(arg)
+	if brace:
+		for alt in iterBraceAlts(brace.group(1)):
+			for Pv in _iterPvArgument(arg[:brace.start()] + alt + 
+			                          arg[brace.end():], state, knownPvs):
+				yield Pv
+		return
+	if globRe.search(arg):
+		if knownPvs is None:
+			print "invalid arg: {0}. No PVs to match against.".format(arg)
+			return
+		match = re.compile(translate(arg)).match
+		for Pv in knownPvs(arg):
+			if match(Pv):
+				yield Pv
+		return
+	pvNum = pvNumRe.match(arg)
+	if pvNum:
+		state["base"], state["width"] = pvNum.group("base"), len(
+			pvNum.group("start"))
+		numRange = pvNum
+	elif getBasePv(arg):
+		state["base"] = getBasePv(arg)
+		yield arg
+		return
+	else:
+		numRange = shortNumRe.match(arg)
+		if not numRange or not state["base"]:
 			print "invalid arg: {0}.".format(arg)
-	return fullPvs
+			return
+	start = int(numRange.group("start"))
+	end   = int(numRange.group("end") or start)
+	if end < start:
+		print "invalid arg: {0}.".format(arg)
+		return
+	for i in xrange(start, end + 1):
+		yield "{0}{1:0{2}}".format(state["base"], i, state["width"])
+
+def iterBraceAlts(body):
+	"""
+	Yields the alternatives of the inside of a brace expansion, expanding
+	numeric sequences like 01..12 with the width of the first number.
+	"""
+	for alt in body.split(","):
+		seq = braceSeqRe.match(alt)
+		if not seq:
+			yield alt
+			continue
+		width = len(seq.group(1))
+		for i in xrange(int(seq.group(1)), int(seq.group(2)) + 1):
+			yield "{0:0{1}}".format(i, width)
+
+def pvNumWidth(Pv):
+	"""Returns the number of digits the PV ends with, 0 if there are none."""
+	pvNum = pvNumRe.match(Pv)
+	return len(pvNum.group("start")) if pvNum else 0
 
 def getBasePv(Pv):
 	"""
-	Returns the first base PV found in the list of PVArguments. It looks for the 
-	first colon starting from the right and then returns the string up until
-	the colon. Takes as input a string or a list of strings.
+	Returns the base PV of the inputted PV, the string up to and including the
+	last colon. Returns None if the PV is too short or has no colon.
 	"""
 	if ':' not in Pv or len(Pv) < 9: 
 		return None
-	for i, char in enumerate(Pv[::-1]):
-		if char == ':':
-			return Pv[:-i]
+	return Pv[:Pv.rindex(':') + 1]
 
 		
+def _auditShard(shard):
+	"""
+	Process pool worker that diffs every device of one (hutch, objType) shard
+	against the pmgr. Returns (hutch, objType, batches), with the batches of 
+	_iterDiffBatches reduced to the description field of each device.
+	"""
+	hutch, objType, batchSize, minColLen, offSet, initKwargs = shard
+	dCfg    = devconfig(**dict(initKwargs, strict = True))
+	batches = []
+	for Pvs, liveFlds, diffDfs, colLen in dCfg._iterDiffBatches(
+			objType, hutch, batchSize, minColLen, offSet):
+		descs = [{"FLD_DESC":liveFld.get("FLD_DESC", "")} for liveFld in 
+		         liveFlds]
+		batches.append((Pvs, descs, diffDfs, colLen))
+	return hutch, objType, batches
+
 #################################################################################
 #                             Stand Alone Routines                              #
 #################################################################################
 
 def Diff(*args, **kwargs):
 	"""Returns the diffs using the inputted paramaters."""
-	dCfg = devconfig()
+	dCfg = devconfig(profile = kwargs.get("profile", False))
 	dCfg.Diff(*args, **kwargs)
+	if kwargs.get("profile", False):
+		dCfg._profiler.report()
+
+def Apply(*args, **kwargs):
+	"""Applies the pmgr configs to the inputted devices."""
+	dCfg = devconfig(profile = kwargs.get("profile", False))
+	dCfg.apply(*args, **kwargs)
+	if kwargs.get("profile", False):
+		dCfg._profiler.report()
+
+def Save(*args, **kwargs):
+	"""Saves the live configs of the inputted devices to the pmgr."""
+	dCfg = devconfig(profile = kwargs.get("profile", False))
+	dCfg.save(*args, **kwargs)
+	if kwargs.get("profile", False):
+		dCfg._profiler.report()
+
+def Snapshot(*args, **kwargs):
+	"""Writes a snapshot of the inputted devices to the path kwarg."""
+	dCfg = devconfig(profile = kwargs.get("profile", False))
+	print "Wrote snapshot to {0}".format(dCfg.snapshot(*args, **kwargs))
+	if kwargs.get("profile", False):
+		dCfg._profiler.report()
+
+def SnapDiff(*args, **kwargs):
+	"""Diffs a snapshot against the pmgr or against a second snapshot."""
+	dCfg = devconfig(profile = kwargs.get("profile", False))
+	dCfg.diffSnapshot(*args, **kwargs)
+	if kwargs.get("profile", False):
+		dCfg._profiler.report()
+
+def Search(*args, **kwargs):
+	"""Prints the pmgr entries matching the inputted search terms."""
+	dCfg = devconfig(profile = kwargs.get("profile", False))
+	dCfg.search(*args, **kwargs)
+	if kwargs.get("profile", False):
+		dCfg._profiler.report()
+
+def Serve(*args, **kwargs):
+	"""
+	Runs a resident devconfig on the socket kwarg (see daemon.py) until it is
+	interrupted. With fake set to a number of devices per hutch, the fake CA
+	and pmgr backends are used instead of the real ones.
+	"""
+	from daemon import serve
+	dcfgKwargs = {"liveCache"       : True,
+	              "liveCacheMaxAge" : 30.0,
+	              "profile"         : kwargs.get("profile", False),
+	              "hutches"         : kwargs.get("hutches"),
+	              "objTypes"        : kwargs.get("objTypes")}
+	if kwargs.get("fake"):
+		from fakeBackends import fakeCABackend, fakePmgrFactory
+		fldMap = devconfig(mode = "local")._objTypeFldMaps["ims_motor"]
+		dcfgKwargs.update(mode = "local", 
+		                  caBackend = fakeCABackend(fldMap = fldMap), 
+		                  pmgrFactory = fakePmgrFactory(fldMap, kwargs["fake"]))
+	serve(devconfig(**dcfgKwargs), kwargs.get("socket"))
 
 #################################################################################
 #                                     Main                                      #
 #################################################################################
 
 if __name__ == "__main__":
-	validCommands = {"diff":Diff}
+	validCommands = {"diff":Diff, "search":Search, "apply":Apply, 
+	                 "save":Save, "snapshot":Snapshot, "snapdiff":SnapDiff,
+	                 "serve":Serve}
 	validOptions  = ["hutches", "objTypes", "mode"]
 	parser = OptionParser()
 	parser.add_option('--hutch', action='store', type='string', dest='hutches', 
@@ -1132,6 +2390,8 @@ if __name__ == "__main__":
 	                  default=None)
 	parser.add_option('--mode', action='store', type='string', dest='mode', 
 	                  default=None)
+	parser.add_option('--match', action='store', type='string', 
+	                  dest='match', default='exact')
 	parser.add_option('--pmgr', '-p', action='store_true', dest='pmgr', 
 	                  default=False)
 	parser.add_option('--tooltip', '-t', action='store_true', dest='tooltip', 
@@ -1140,9 +2400,34 @@ if __name__ == "__main__":
 	                  default=False)
 	parser.add_option('--offset', action='store',type='int',  dest='offSet', 
 	                  default=0)
+	parser.add_option('--all', '-a', action='store_true', dest='all', 
+	                  default=False)
+	parser.add_option('--batch', action='store', type='int', dest='batchSize', 
+	                  default=20)
+	parser.add_option('--procs', action='store', type='int', dest='processes', 
+	                  default=1)
+	parser.add_option('--file', '-f', action='store', type='string', 
+	                  dest='path', default=None)
+	parser.add_option('--concurrent', action='store', type='int', 
+	                  dest='maxConcurrent', default=8)
+	parser.add_option('--strict', action='store_true', dest='strict', 
+	                  default=None)
+	parser.add_option('--negcache-age', action='store', type='float', 
+	                  dest='negCacheMaxAge', default=None)
+	parser.add_option('--socket', action='store', type='string', 
+	                  dest='socket', default=None)
+	parser.add_option('--fake', action='store', type='int', dest='fake', 
+	                  default=0)
+	parser.add_option('--profile', action='store_true', dest='profile', 
+	                  default=False)
+	parser.add_option('--output', '-o', action='store', type='string', 
+	                  dest='output', default=None)
 
 	options, args = parser.parse_args()
 	kwargs = vars(options)
+	output = kwargs.pop('output')
+	if output:
+		kwargs['out'] = open(output, 'w')
 	for cmd in validCommands.keys():
 		if cmd in args:
 			args.remove(cmd)
@@ -0,0 +1,41 @@
+"""
+Vectorized diffs between field dictionaries.
+
+The values of N devices are laid out in a single devices x fields array whose
+columns follow the field map order, so finding the differing fields of every
+device is one elementwise comparison instead of nested dictionary loops.
+"""
+import numpy as np
+
+def fldMatrix(fldDicts, flds, missing="N/A"):
+	"""
+	Returns an object array with one row per field dictionary and one column
+	per field in flds. Missing dictionaries or fields are set to missing.
+	"""
+	matrix = np.empty((len(fldDicts), len(flds)), dtype=object)
+	matrix.fill(missing)
+	for i, fldDict in enumerate(fldDicts):
+		if fldDict:
+			matrix[i] = [fldDict.get(fld, missing) for fld in flds]
+	return matrix
+
+def pairDiffMask(matrixA, matrixB):
+	"""
+	Returns a devices x fields boolean array that is True wherever the two
+	matrices differ, i.e. the diffs of every device pair in one pass.
+	"""
+	return matrixA != matrixB
+
+def anyDiffMask(matrix):
+	"""
+	Returns a fields boolean array that is True for every field whose value
+	is not the same across all the rows of the matrix.
+	"""
+	if not matrix.shape[0]:
+		return np.zeros(matrix.shape[1], dtype=bool)
+	return (matrix != matrix[0]).any(axis=0)
+
+def maxValLen(*matrices):
+	"""Returns the length of the longest value in the inputted matrices."""
+	lens = [len(str(val)) for matrix in matrices for val in matrix.flat]
+	return max(lens) if lens else 0
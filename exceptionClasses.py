@@ -52,6 +52,14 @@ class InvalidHutchError(Error):
 	def __str__(self):
 		return repr("Invalid Hutch(es) Inputted: {0}".format(self.hutchEntry))
 
+class UnresolvedPvError(Error):
+	"""Exception raised if the hutch or objType of PVs could not be inferred."""
+	def __init__(self, Pvs):
+		self.Pvs = Pvs
+	def __str__(self):
+		return repr("Could not infer the hutch or objType of {0} PV(s): {1}".format(
+			len(self.Pvs), ", ".join(self.Pvs)))
+
 # class NoValidHutchError(Error):
 # 	"""Exception raised if none of the hutch inputs are valid."""
 # 	def __init__(self, hutchEntries):
@@ -0,0 +1,275 @@
+"""
+In-process stand-ins for the CA and pmgr backends.
+
+fakeCABackend implements the caReader backend methods, recording every put,
+and fakePmgrFactory creates pmgrobj look-alikes filled with synthetic objs and
+cfgs, so devconfig can be exercised and benchmarked without a live beamline.
+Both can add a fixed per-call latency and mark a fraction of devices as
+disconnected.
+"""
+import time
+import random
+from zlib import crc32
+
+class fakeCAError(Exception):
+	"""Exception raised by the fake CA backend."""
+	pass
+
+def devicePvs(hutch, nDevices, key=":MMS:"):
+	"""Returns the base PVs of nDevices synthetic devices in the hutch."""
+	return ["{0}{1}{2:04}".format(hutch.upper(), key, i + 1) for i in
+	        range(nDevices)]
+
+def deviceSN(basePv):
+	"""Returns the deterministic serial number of a synthetic device."""
+	return str(crc32(basePv) & 0xffffffff)
+
+def zeroValue(fldType):
+	"""Returns the zero a channel of the field map type reads back."""
+	return 0.0 if fldType == "<type 'float'>" else 0
+
+class fakeChannel(object):
+	"""Channel handed out by fakeCABackend."""
+	__slots__ = ("name", "connected", "readyAt", "callback")
+	def __init__(self, name, connected, readyAt):
+		self.name      = name
+		self.connected = connected
+		self.readyAt   = readyAt
+		self.callback  = None
+
+class fakeCABackend(object):
+	"""
+	Fake CA backend. Every channel returns 0 (0.0 for the float fields of 
+	fldMap if one is given) except the serial number field (idSuffix), which
+	returns the device's deterministic SN, and any entries of values. 
+	Channels become ready latency seconds after they are created, and a 
+	device (all the channels sharing a base PV) is disconnected with
+	probability disconnectRate. If devicesPerIoc is set, devices are put on
+	fake IOCs devicesPerIoc at a time, in the order they are first seen, and
+	whole IOCs are disconnected instead.
+	"""
+	error = fakeCAError
+
+	def __init__(self, values=None, latency=0.0, disconnectRate=0.0,
+	             idSuffix=".SN", seed=0, fldMap=None, devicesPerIoc=None,
+	             monitors=True):
+		self.values         = values or {}
+		self.zeros          = {}      #Dict of pv extension:zero value
+		if fldMap is not None:
+			self.zeros = {fldMap.pv[fld]:zeroValue(fldMap.type[fld]) for fld 
+			              in fldMap.index}
+		self.latency        = latency
+		self.disconnectRate = disconnectRate
+		self.idSuffix       = idSuffix
+		self._random        = random.Random(seed)
+		self.devicesPerIoc  = devicesPerIoc
+		self._deadDevices   = {}      #Dict of basePv or IOC host:bool
+		self._iocs          = {}      #Dict of basePv:IOC host
+		self.monitors       = monitors #False makes every subscribe fail
+		self._monitored     = {}      #Dict of name:list of monitored chans
+		self.creates        = 0
+		self.puts           = []      #List of (name,value) in write order
+
+	def _basePv(self, name):
+		return name.rsplit(".", 1)[0] if "." in name else name.rsplit(":", 1)[0]
+
+	def _iocHost(self, basePv):
+		"""Returns the fake IOC host of the device."""
+		if basePv not in self._iocs:
+			self._iocs[basePv] = "ioc-fake-{0:03}:5064".format(
+				len(self._iocs) // self.devicesPerIoc)
+		return self._iocs[basePv]
+
+	def isDead(self, name):
+		"""Returns True if the device the channel belongs to is disconnected."""
+		key = self._basePv(name)
+		if self.devicesPerIoc:
+			key = self._iocHost(key)
+		if key not in self._deadDevices:
+			self._deadDevices[key] = self._random.random() < self.disconnectRate
+		return self._deadDevices[key]
+
+	def host(self, chan):
+		"""Returns the fake IOC host of a connected channel, or None."""
+		if not self.devicesPerIoc or not chan.connected:
+			return None
+		return self._iocHost(self._basePv(chan.name))
+
+	def create(self, name):
+		self.creates += 1
+		return fakeChannel(name, not self.isDead(name),
+		                   time.time() + self.latency)
+
+	def flush(self):
+		pass
+
+	def wait(self, chan, timeout):
+		if not chan.connected:
+			time.sleep(timeout)
+			return False
+		remaining = chan.readyAt - time.time()
+		if remaining > timeout:
+			time.sleep(timeout)
+			return False
+		if remaining > 0:
+			time.sleep(remaining)
+		return True
+
+	def value(self, chan):
+		if chan.name in self.values:
+			return self.values[chan.name]
+		if chan.name.endswith(self.idSuffix):
+			return deviceSN(self._basePv(chan.name))
+		pvExt = chan.name[len(self._basePv(chan.name)):]
+		return self.zeros.get(pvExt, 0)
+
+	def put(self, chan, value):
+		if not chan.connected:
+			raise fakeCAError("Channel {0} is not connected".format(chan.name))
+		self.values[chan.name] = value
+		self.puts.append((chan.name, value))
+
+	def subscribe(self, name, callback):
+		if not self.monitors or self.isDead(name):
+			raise fakeCAError("Could not monitor {0}".format(name))
+		chan = self.create(name)
+		chan.callback = callback
+		self._monitored.setdefault(name, []).append(chan)
+		return chan
+
+	def close(self, chan):
+		chan.callback = None
+		if chan in self._monitored.get(chan.name, ()):
+			self._monitored[chan.name].remove(chan)
+
+	def setValue(self, name, value):
+		"""Changes the value of the channel, updating its monitors."""
+		self.values[name] = value
+		for chan in list(self._monitored.get(name, ())):
+			chan.callback(name, value)
+
+	def disconnect(self, basePv):
+		"""
+		Disconnects the device, telling the monitors of its channels like a 
+		CA connection callback would.
+		"""
+		self._deadDevices[basePv] = True
+		for name, chans in self._monitored.items():
+			if self._basePv(name) == basePv:
+				for chan in list(chans):
+					chan.connected = False
+					chan.callback(name, None)
+
+class fakePmgrobj(object):
+	"""
+	pmgrobj look-alike holding synthetic objs and cfgs. The rows live in a
+	fake database and objs and cfgs are the local copies loaded from it, like
+	the real pmgr, so changes only show up once the tables are loaded again.
+	Committed rows get a new dt_updated. With incremental set, updatedRows
+	returns the rows updated since a dt_updated, otherwise it is None like on
+	a pmgrobj that cannot query them.
+	"""
+	def __init__(self, table, hutch, objs, cfgs, latency=0.0, 
+	             incremental=True):
+		self.table   = table
+		self.hutch   = hutch
+		self.objs    = {}
+		self.cfgs    = {}
+		self.latency = latency
+		self.updates = 0
+		self.commits = 0
+		self.fetched = 0              #Rows loaded from the database
+		self._db     = {"obj":objs, "cfg":cfgs}
+		self._changes = []            #List of (kind,id,change) to commit
+		if not incremental:
+			self.updatedRows = None
+
+	def updateTables(self):
+		time.sleep(self.latency)
+		self.updates += 1
+		# A real reload hands back new table dicts and rows
+		self.objs = {rowID:dict(row) for rowID, row in self._db["obj"].items()}
+		self.cfgs = {rowID:dict(row) for rowID, row in self._db["cfg"].items()}
+		self.fetched += len(self.objs) + len(self.cfgs)
+
+	def updatedRows(self, kind, since):
+		"""
+		Returns copies of the obj or cfg rows whose dt_updated is at or after
+		since (every row if since is None).
+		"""
+		time.sleep(self.latency)
+		rows = [dict(row) for row in self._db[kind].itervalues() if 
+		        since is None or row["dt_updated"] >= since]
+		self.fetched += len(rows)
+		return rows
+
+	def remoteChange(self, kind, rowID, change):
+		"""Changes a row in the database as another pmgr user would."""
+		row = dict(self._db[kind].get(rowID, {"id":rowID}), **change)
+		row["dt_updated"] = time.strftime("%Y-%m-%d %H:%M:%S")
+		self._db[kind][rowID] = row
+
+	def start_transaction(self):
+		self._changes = []
+
+	def objectChange(self, objID, change):
+		self._changes.append(("obj", objID, change))
+
+	def configChange(self, cfgID, change):
+		self._changes.append(("cfg", cfgID, change))
+
+	def end_transaction(self):
+		"""Commits the queued changes in one go and returns the errors."""
+		time.sleep(self.latency)
+		self.commits += 1
+		for kind, rowID, change in self._changes:
+			self.remoteChange(kind, rowID, change)
+		self._changes = []
+		return []
+
+class fakePmgrFactory(object):
+	"""
+	Callable used as the devconfig pmgrFactory. Each (objType, hutch) gets
+	nDevices synthetic objs, each with its own cfg, whose fields match the
+	values returned by fakeCABackend. diffRate is the fraction of cfg fields
+	that are changed so that diffs show up. incremental is passed on to the
+	fakePmgrobjs.
+	"""
+	def __init__(self, fldMap, nDevices, latency=0.0, diffRate=0.0, seed=0,
+	             incremental=True):
+		self.fldMap      = fldMap
+		self.nDevices    = nDevices
+		self.latency     = latency
+		self.diffRate    = diffRate
+		self.seed        = seed
+		self.incremental = incremental
+
+	def __call__(self, objType, hutch):
+		fldMap = self.fldMap
+		rand   = random.Random(self.seed)
+		flds   = [(fld, bool(row["obj"]), row["enum"], row["type"]) for fld, row 
+		          in zip(fldMap.index, fldMap.to_dict("records"))]
+		objs, cfgs = {}, {}
+		for i, basePv in enumerate(devicePvs(hutch, self.nDevices)):
+			objID = cfgID = i + 1
+			# Rows were last updated a minute apart, oldest first
+			updated = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(
+				1483228800 + i * 60))
+			obj = {"id": objID, "name": basePv, "config": cfgID,
+			       "rec_base": basePv, "dt_updated": updated}
+			cfg = {"id": cfgID, "name": basePv + " cfg", "dt_updated": updated}
+			for fld, isObj, enum, fldType in flds:
+				if fld == "FLD_SN":
+					val = deviceSN(basePv)
+				else:
+					val = enum[0] if enum else str(zeroValue(fldType))
+				if isObj:
+					obj[fld] = val
+				else:
+					if rand.random() < self.diffRate:
+						val = enum[-1] if enum else str(zeroValue(fldType) + 1)
+					cfg[fld] = val
+			objs[objID], cfgs[cfgID] = obj, cfg
+		time.sleep(self.latency)
+		return fakePmgrobj(objType, hutch, objs, cfgs, self.latency,
+		                   self.incremental)
@@ -0,0 +1,79 @@
+"""
+Compact, immutable form of the objType field maps.
+
+The field maps are loaded as DataFrames, which are convenient for display but
+slow to index one field at a time. compileFldMap turns a field map into a
+fieldMap of FieldSpec records holding what the per-device loops need (pv
+suffix, enum table, type, obj flag, ordering and mutex information), so those
+loops use plain attribute lookups. The DataFrame is kept for display.
+"""
+from collections import namedtuple
+
+class FieldSpec(namedtuple("FieldSpec", ["fld", "alias", "tooltip", "pv", 
+                                         "enum", "type", "obj", "readonly", 
+                                         "nullok", "setorder", "colorder", 
+                                         "mutex", "setmutex", "mustwrite",
+                                         "writezero"])):
+	"""
+	Immutable record of one field of a field map. enum is a tuple of the enum
+	strings (empty if the field is not an enum) and mutex a tuple of the mutex
+	groups the field belongs to.
+	"""
+	__slots__ = ()
+
+class fieldMap(object):
+	"""
+	Ordered, read-only collection of the FieldSpecs of a field map. Iterating
+	yields the specs in field map order and fields can be looked up by name.
+	pvs and decoders run parallel to the specs: the pv suffixes, and for enum
+	fields a dict of enum index to enum string (None for other fields). 
+	aliasWidth and tooltipWidth are the lengths of the longest alias and 
+	tooltip, so tables can be sized without looking at their rows.
+	"""
+	__slots__ = ("specs", "flds", "pvs", "decoders", "aliasWidth", 
+	             "tooltipWidth", "_byFld")
+
+	def __init__(self, specs):
+		self.specs    = tuple(specs)
+		self.flds     = tuple(spec.fld for spec in self.specs)
+		self.pvs      = tuple(spec.pv for spec in self.specs)
+		self.decoders = tuple(dict(enumerate(spec.enum)) if spec.enum else None
+		                      for spec in self.specs)
+		self.aliasWidth   = max([0] + [len(spec.alias) for spec in self.specs])
+		self.tooltipWidth = max([0] + [len(spec.tooltip) for spec in 
+		                               self.specs])
+		self._byFld   = dict(zip(self.flds, self.specs))
+
+	def __getitem__(self, fld):
+		return self._byFld[fld]
+
+	def __contains__(self, fld):
+		return fld in self._byFld
+
+	def __iter__(self):
+		return iter(self.specs)
+
+	def __len__(self):
+		return len(self.specs)
+
+def compileFldMap(fldMapDf):
+	"""Returns the fieldMap of the inputted field map DataFrame."""
+	specs = []
+	for fld, row in zip(fldMapDf.index, fldMapDf.to_dict('records')):
+		specs.append(FieldSpec(
+			fld       = fld,
+			alias     = row['alias'],
+			tooltip   = str(row['tooltip']),
+			pv        = row['pv'],
+			enum      = tuple(row['enum'] or ()),
+			type      = row['type'],
+			obj       = bool(row['obj']),
+			readonly  = bool(row['readonly']),
+			nullok    = bool(row['nullok']),
+			setorder  = int(row['setorder']),
+			colorder  = int(row['colorder']),
+			mutex     = tuple(row['mutex'] or ()),
+			setmutex  = bool(row['setmutex']),
+			mustwrite = bool(row['mustwrite']),
+			writezero = bool(row['writezero'])))
+	return fieldMap(specs)
@@ -0,0 +1,119 @@
+"""
+On-disk cache of the compiled devconfig metadata and field maps.
+
+Reading the local csvs means running read_csv, fillna and literal_eval over
+every cell, and then slicing and compiling the results into lookups, which
+dominates startup time. The compiled results are pickled into a single binary
+file in the user's own cache directory and reused until the source file 
+changes. Unpickling runs code, so cache files that are not owned by the user
+are never read. A change is detected by mtime and size first, then confirmed
+against an md5 of the file so that touching a file without editing it does 
+not force a reparse.
+"""
+import os
+import cPickle as pickle
+from hashlib import md5
+from tempfile import mkstemp
+
+import pandas
+
+cacheVersion = 4                      #Bumped when the cached objects change
+
+class metaCache(object):
+	"""
+	Cache of parsed source files keyed by (path, parse arguments). Entries are
+	loaded lazily from cachePath on first use and written back on a miss.
+	"""
+	def __init__(self, cachePath, enabled=True):
+		self.cachePath = cachePath
+		self.enabled   = enabled
+		self._entries  = None         #Dict of key:(mtime,size,md5,obj)
+		self.hits      = 0
+		self.misses    = 0
+
+	def load(self, srcPath, parser, *args):
+		"""
+		Returns parser(srcPath, *args), using the cached result if the source
+		file has not changed since it was stored.
+		"""
+		if not self.enabled:
+			return parser(srcPath, *args)
+		entries = self._getEntries()
+		key     = (srcPath,) + args
+		stat    = os.stat(srcPath)
+		entry   = entries.get(key)
+		if entry is not None:
+			mtime, size, digest, obj = entry
+			if mtime == stat.st_mtime and size == stat.st_size:
+				self.hits += 1
+				return obj
+			if size == stat.st_size and digest == fileDigest(srcPath):
+				entries[key] = (stat.st_mtime, size, digest, obj)
+				self._write()
+				self.hits += 1
+				return obj
+		self.misses += 1
+		obj = parser(srcPath, *args)
+		entries[key] = (stat.st_mtime, stat.st_size, fileDigest(srcPath), obj)
+		self._write()
+		return obj
+
+	def clear(self):
+		"""Removes all cached entries, including the cache file."""
+		self._entries = {}
+		try:
+			os.remove(self.cachePath)
+		except OSError:
+			pass
+
+	def _getEntries(self):
+		"""Returns the cached entries, reading the cache file if needed."""
+		if self._entries is None:
+			self._entries = {}
+			try:
+				with open(self.cachePath, 'rb') as cacheFile:
+					if os.fstat(cacheFile.fileno()).st_uid != os.getuid():
+						raise IOError("{0} is not owned by the user".format(
+							self.cachePath))
+					header, entries = pickle.load(cacheFile)
+				if header == (cacheVersion, pandas.__version__):
+					self._entries = entries
+			except Exception:
+				# Missing, unreadable or incompatible caches are just rebuilt
+				pass
+		return self._entries
+
+	def _write(self):
+		"""
+		Writes the entries to the cache file. The file is replaced atomically
+		so concurrent devconfig instances never read a partial cache.
+		"""
+		cacheDir = os.path.dirname(self.cachePath)
+		try:
+			if not os.path.isdir(cacheDir):
+				os.makedirs(cacheDir, 0o700)
+			fd, tmpPath = mkstemp(dir=cacheDir)
+			with os.fdopen(fd, 'wb') as tmpFile:
+				pickle.dump(((cacheVersion, pandas.__version__), self._entries),
+				            tmpFile, pickle.HIGHEST_PROTOCOL)
+			os.rename(tmpPath, self.cachePath)
+		except (IOError, OSError):
+			# A cache that cannot be written only costs the reparse next time
+			pass
+
+def fileDigest(srcPath):
+	"""Returns the md5 hex digest of the file contents."""
+	with open(srcPath, 'rb') as srcFile:
+		return md5(srcFile.read()).hexdigest()
+
+def defaultCachePath(dbDir):
+	"""
+	Returns the path of the cache file of the db directory in the user's cache
+	directory ($XDG_CACHE_HOME or ~/.cache). The cache is never kept in the db
+	directory, which may be shared by a whole group.
+	"""
+	cacheHome = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+		os.path.expanduser("~"), ".cache")
+	dbKey = md5(os.path.realpath(dbDir)).hexdigest()[:12]
+	return os.path.join(cacheHome, "devconfig", "metaCache-{0}.pkl".format(
+		dbKey))
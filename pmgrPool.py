@@ -0,0 +1,221 @@
+"""
+Pool of reusable pmgr handles for devconfig.
+
+Creating a pmgrobj and loading its tables is expensive, so handles are kept
+per (objType, hutch) and their tables are only synced once they are older
+than the staleness window, or after they have been explicitly invalidated.
+
+Syncs are incremental. Handles that can list the rows updated since a given
+dt_updated (updatedRows(kind, since), e.g. the fake pmgrobj) only fetch those
+rows, which are merged into copies of the handle's obj and cfg tables. Other
+handles reload their tables, which are compared against the old ones. Tables
+are never modified once they are in use, a sync swaps in new ones, so other
+threads can keep reading the tables they got while a sync runs. Every sync 
+bumps the handle's version and logs the IDs of the rows it changed, letting
+the indexes built on the tables update just those rows (see changes()). 
+Deleted rows have no dt_updated to find them by, so the tables are still 
+reloaded in full every fullSyncAge seconds.
+"""
+import time
+from threading import Lock
+from itertools import count
+
+_versions = count(1)                  #Versions unique across pools and handles
+
+class pmgrEntry(object):
+	"""Pooled pmgr handle along with its sync state."""
+	__slots__ = ("pmgr", "syncTime", "fullTime", "since", "version",
+	             "logStart", "log")
+	def __init__(self, pmgr, now):
+		self.pmgr        = pmgr
+		self.syncTime    = now        #Time of the last sync
+		self.fullTime    = now        #Time of the last full load
+		self.since       = {}         #Dict of kind:newest dt_updated seen
+		self.version     = next(_versions)
+		self.logStart    = self.version #Oldest version the log goes back to
+		self.log         = []         #List of (version,{kind:set of IDs})
+
+class pmgrPool(object):
+	"""
+	Keeps one pmgr handle per (objType, hutch). The factory is called as
+	factory(objType, hutch) to create new handles.
+	"""
+	maxLog = 64                       #Syncs kept in the change log of a handle
+
+	def __init__(self, factory, maxAge=60.0, fullSyncAge=3600.0):
+		self._factory    = factory
+		self._handles    = {}         #Dict of (objType,hutch):pmgrEntry
+		self._locks      = {}         #Dict of (objType,hutch):Lock
+		self._lock       = Lock()
+		self.maxAge      = maxAge     #Seconds before tables are synced
+		self.fullSyncAge = fullSyncAge #Seconds before tables are reloaded
+		self.fullLoads   = 0
+		self.syncs       = 0
+		self.rowsSynced  = 0          #Rows fetched or changed by syncs
+
+	def get(self, objType, hutch):
+		"""
+		Returns the pmgr handle for the objType and hutch, creating it or
+		syncing its tables if they are older than maxAge.
+		"""
+		return self._get(objType, hutch, False).pmgr
+
+	def sync(self, objType, hutch):
+		"""
+		Syncs the tables of the objType and hutch handle now, e.g. after
+		writing to the pmgr, and returns the handle.
+		"""
+		return self._get(objType, hutch, True).pmgr
+
+	def version(self, objType, hutch):
+		"""Returns the version of the objType and hutch tables, None if unset."""
+		entry = self._handles.get((objType, hutch))
+		return None if entry is None else entry.version
+
+	def changes(self, objType, hutch, version):
+		"""
+		Returns a dictionary of 'obj' and 'cfg' to the set of row IDs changed
+		or deleted since the inputted version of the tables, or None if that
+		is not known (the tables were reloaded since or the version is too old)
+		and anything built on the tables has to be rebuilt.
+		"""
+		entry = self._handles.get((objType, hutch))
+		if entry is None or version is None or version < entry.logStart:
+			return None
+		changed = {"obj":set(), "cfg":set()}
+		for logVersion, rowIDs in entry.log:
+			if logVersion > version:
+				for kind, ids in rowIDs.iteritems():
+					changed[kind] |= ids
+		return changed
+
+	def _get(self, objType, hutch, force):
+		key = (objType, hutch)
+		with self._lock:
+			keyLock = self._locks.setdefault(key, Lock())
+		# Different hutches can load at the same time, the same one only once
+		with keyLock:
+			now = time.time()
+			entry = self._handles.get(key)
+			if entry is None:
+				pmgr = self._factory(objType, hutch)
+				pmgr.updateTables()
+				entry = self._handles[key] = pmgrEntry(pmgr, now)
+				self._setSince(entry)
+				self.fullLoads += 1
+			elif force or (self.maxAge is not None and
+			               now - entry.syncTime > self.maxAge):
+				self._sync(entry, now)
+			return entry
+
+	def _sync(self, entry, now):
+		"""
+		Brings the tables of the entry up to date, swapping in new tables, and
+		logs the changed row IDs under a new version.
+		"""
+		pmgr = entry.pmgr
+		full = (getattr(pmgr, "updatedRows", None) is None or (
+			self.fullSyncAge is not None and
+			now - entry.fullTime > self.fullSyncAge))
+		objs, cfgs = pmgr.objs, pmgr.cfgs
+		if full:
+			pmgr.updateTables()
+			if pmgr.objs is objs or pmgr.cfgs is cfgs:
+				# Reloaded in place, there is nothing to compare against
+				changed = None
+			else:
+				changed = {"obj":tableChanges(objs, pmgr.objs),
+				           "cfg":tableChanges(cfgs, pmgr.cfgs)}
+			entry.fullTime = now
+			self.fullLoads += 1
+		else:
+			changed, tables = {}, {}
+			for kind, table in (("obj", objs), ("cfg", cfgs)):
+				rows = pmgr.updatedRows(kind, entry.since.get(kind))
+				tables[kind], changed[kind] = mergeRows(table, rows)
+			pmgr.objs, pmgr.cfgs = tables["obj"], tables["cfg"]
+			self.syncs += 1
+		entry.version  = next(_versions)
+		entry.syncTime = now
+		if changed is None:
+			entry.logStart = entry.version
+			entry.log = []
+		else:
+			self.rowsSynced += sum(len(ids) for ids in changed.values())
+			entry.log.append((entry.version, changed))
+			if len(entry.log) > self.maxLog:
+				entry.logStart = entry.log[-self.maxLog - 1][0]
+				del entry.log[:-self.maxLog]
+		self._setSince(entry, changed)
+
+	def _setSince(self, entry, changed=None):
+		"""
+		Records the newest dt_updated of the tables, looking only at the
+		changed rows if they are given.
+		"""
+		for kind, table in (("obj", entry.pmgr.objs), ("cfg", entry.pmgr.cfgs)):
+			if changed is None:
+				rows = table.itervalues()
+			else:
+				rows = (table[rowID] for rowID in changed[kind] if rowID in table)
+			dates = [row["dt_updated"] for row in rows if
+			         row.get("dt_updated") is not None]
+			if entry.since.get(kind) is not None:
+				dates.append(entry.since[kind])
+			if dates:
+				entry.since[kind] = max(dates)
+
+	def invalidate(self, objType=None, hutch=None):
+		"""
+		Drops the handles matching the objType and hutch so they are recreated
+		on next use. Drops every handle if neither is given.
+		"""
+		with self._lock:
+			for key in self._handles.keys():
+				if ((objType is None or key[0] == objType) and
+				    (hutch is None or key[1] == hutch)):
+					del self._handles[key]
+
+	def stats(self):
+		"""Returns a dictionary of the load and sync counters."""
+		return {"handles"    : len(self._handles),
+		        "fullLoads"  : self.fullLoads,
+		        "syncs"      : self.syncs,
+		        "rowsSynced" : self.rowsSynced}
+
+	def __contains__(self, key):
+		return key in self._handles
+
+	def __len__(self):
+		return len(self._handles)
+
+def mergeRows(table, rows):
+	"""
+	Returns the table with the inputted rows merged in by ID, and the set of
+	IDs of the rows that were new or different. The table is copied before
+	the first change rather than modified.
+	"""
+	newTable, changed = table, set()
+	for row in rows:
+		rowID = row["id"]
+		if table.get(rowID) != row:
+			if newTable is table:
+				newTable = dict(table)
+			newTable[rowID] = row
+			changed.add(rowID)
+	return newTable, changed
+
+def tableChanges(table, newTable):
+	"""
+	Returns the set of IDs of the rows that were added, changed or deleted
+	going from table to newTable. Rows with an unchanged dt_updated count as
+	unchanged.
+	"""
+	changed = set()
+	for rowID, row in newTable.iteritems():
+		old = table.get(rowID)
+		if old is None or (old.get("dt_updated") != row.get("dt_updated") if
+		                   row.get("dt_updated") is not None else old != row):
+			changed.add(rowID)
+	changed.update(set(table).difference(newTable))
+	return changed
@@ -0,0 +1,49 @@
+"""
+Character trie used to map PV prefixes to hutches.
+
+Every hutch name and hutch alias is inserted once when the metadata is loaded.
+Looking up a PV then walks its characters a single time, instead of slicing
+the PV and rebuilding hutch and alias sets for each one.
+"""
+
+class prefixTrie(object):
+	"""
+	Trie of lower case prefixes to values. Lookups return the value of the
+	longest prefix of the key that ends on a boundary, i.e. is followed by a
+	non-alphanumeric character (the ':' in 'XPP:MMS:01') or the end of key.
+	"""
+	_end = ""                         #Key of a node's value
+
+	def __init__(self):
+		self._root = {}
+
+	def add(self, prefix, value):
+		"""Sets the value of the prefix."""
+		node = self._root
+		for char in prefix.lower():
+			node = node.setdefault(char, {})
+		node[self._end] = value
+
+	def longest(self, key, default=None):
+		"""
+		Returns the value of the longest prefix of the key ending on a
+		boundary, or default if there is none.
+		"""
+		node, value = self._root, default
+		key = key.lower()
+		for i, char in enumerate(key):
+			node = node.get(char)
+			if node is None:
+				break
+			if self._end in node and (i + 1 == len(key) or
+			                          not key[i + 1].isalnum()):
+				value = node[self._end]
+		return value
+
+	def __contains__(self, prefix):
+		node = self._root
+		for char in prefix.lower():
+			node = node.get(char)
+			if node is None:
+				return False
+		return self._end in node
@@ -0,0 +1,70 @@
+"""
+Per-phase timing instrumentation for devconfig.
+
+Code paths wrap their work in profiler.phase(name, values) blocks. When the
+profiler is enabled each phase accumulates its call count, wall time and the
+number of values (channels, objs, rows...) it handled. When disabled, phase()
+hands back a shared no-op context so the instrumented code costs next to
+nothing.
+"""
+import sys
+import time
+
+class _nullPhase(object):
+	"""No-op context used while profiling is disabled."""
+	__slots__ = ()
+	def __enter__(self):
+		return self
+	def __exit__(self, *exc):
+		return False
+
+_NULL_PHASE = _nullPhase()
+
+class _phase(object):
+	"""Context that adds its wall time to the phase entry on exit."""
+	__slots__ = ("entry", "start")
+	def __init__(self, entry):
+		self.entry = entry
+	def __enter__(self):
+		self.start = time.time()
+		return self
+	def __exit__(self, *exc):
+		self.entry[1] += time.time() - self.start
+		return False
+
+class phaseTimer(object):
+	"""Accumulates per-phase wall time, call counts and values handled."""
+	def __init__(self, enabled=False):
+		self.enabled = enabled
+		self._phases = {}             #Dict of name:[calls,seconds,values]
+
+	def phase(self, name, values=0):
+		"""Returns a context that times one call of the named phase."""
+		if not self.enabled:
+			return _NULL_PHASE
+		entry = self._phases.setdefault(name, [0, 0.0, 0])
+		entry[0] += 1
+		entry[2] += values
+		return _phase(entry)
+
+	def stats(self):
+		"""Returns a dictionary of phase name to calls, seconds and values."""
+		return {name: {"calls": calls, "seconds": seconds, "values": values}
+		        for name, (calls, seconds, values) in self._phases.items()}
+
+	def reset(self):
+		"""Clears all the accumulated phases."""
+		self._phases = {}
+
+	def report(self, out=None):
+		"""
+		Writes a breakdown of the phases, slowest first. Phases can be nested
+		(e.g. ca read inside diff), so the times are inclusive.
+		"""
+		out = out or sys.stderr
+		out.write("{0:<16} {1:>7} {2:>10} {3:>10} {4:>10}\n".format(
+			"phase", "calls", "total (s)", "mean (ms)", "values"))
+		for name, (calls, seconds, values) in sorted(
+				self._phases.items(), key=lambda item: -item[1][1]):
+			out.write("{0:<16} {1:>7} {2:>10.3f} {3:>10.2f} {4:>10}\n".format(
+				name, calls, seconds, seconds / calls * 1e3, values))
@@ -0,0 +1,40 @@
+"""
+Streaming table renderer for devconfig.
+
+Column widths are worked out once up front from precomputed value lengths and
+the table is then produced one line at a time, so large tables can be written
+out incrementally without ever building the whole string in memory.
+"""
+import sys
+
+def colWidth(lengths, minWidth=0):
+	"""Returns the width of a column given the lengths of its entries."""
+	return max([minWidth] + [int(length) for length in lengths])
+
+def iterTable(header, rows, widths, nLeft=1):
+	"""
+	Yields the lines of a table. The first nLeft columns are left justified
+	(the name/index columns) and the rest are right justified (the values).
+	"""
+	cellFmts = []
+	for i, width in enumerate(widths):
+		if i < nLeft:
+			cellFmts.append("{{:<{0}}}".format(width))
+		else:
+			cellFmts.append("{{:>{0}}}".format(width))
+	rowFmt     = " " + " ".join(cellFmts)
+	headerLine = rowFmt.format(*header)
+	rule       = "-" * len(headerLine)
+	yield rule
+	yield headerLine
+	yield rule
+	for row in rows:
+		yield rowFmt.format(*row)
+	yield rule
+
+def writeLines(lines, out=None):
+	"""Writes each line to out (stdout by default) as soon as it is yielded."""
+	if out is None:
+		out = sys.stdout
+	for line in lines:
+		out.write(line + "\n")
@@ -0,0 +1,176 @@
+"""
+In-memory inverted index over the pmgr obj and cfg tables.
+
+Each indexed field value is normalized to lower case and stored whole, split
+into words and split into PV name parts. Tokens map to the rows containing
+them (exact matches), a sorted token list answers prefix queries with bisect,
+and an n-gram index over the tokens gives fuzzy matches ranked by n-gram
+overlap. Tables are folded in incrementally: only rows that are new or whose
+indexed values changed are retokenized, and rows known to have changed can be
+folded in on their own.
+"""
+import re
+from bisect import bisect_left, insort
+
+wordSplit = re.compile(r"[\s,;/]+")
+partSplit = re.compile(r"[:.]+")
+
+def tokenize(val):
+	"""
+	Returns the set of tokens of a field value: the whole value, its words and
+	the parts of words like PV names that are joined by colons or dots.
+	"""
+	val = str(val).strip().lower()
+	if not val:
+		return set()
+	tokens = set([val])
+	for word in wordSplit.split(val):
+		if word:
+			tokens.add(word)
+			tokens.update(part for part in partSplit.split(word) if part)
+	return tokens
+
+def nGrams(token, n):
+	"""Returns the set of n-grams of the token, padded at both ends."""
+	padded = " " + token + " "
+	if len(padded) <= n:
+		return set([padded])
+	return set(padded[i:i+n] for i in range(len(padded) - n + 1))
+
+class pmgrSearchIndex(object):
+	"""
+	Inverted index over the obj and cfg rows of any number of (hutch, objType)
+	tables. Rows are keyed by (hutch, objType, kind, id) where kind is 'obj'
+	or 'cfg'.
+	"""
+	def __init__(self, objFlds, cfgFlds=("name",), n=3):
+		self.objFlds    = tuple(objFlds)
+		self.cfgFlds    = tuple(cfgFlds)
+		self.n          = n
+		self._rows      = {}          #Dict of key:(signature,tokens)
+		self._postings  = {}          #Dict of token:set of keys
+		self._tokens    = []          #Sorted list of all tokens
+		self._grams     = {}          #Dict of n-gram:set of tokens
+		self._tables    = {}          #Dict of (hutch,objType,kind):table
+		self._tableKeys = {}          #Dict of (hutch,objType,kind):set of keys
+
+	def update(self, hutch, objType, objs, cfgs, force=False):
+		"""
+		Folds the current obj and cfg tables of the hutch and objType into the
+		index. Tables that are the same objects as last time are skipped unless
+		force is set (e.g. they were reloaded in place) and only changed, new
+		or removed rows are touched otherwise.
+		"""
+		for kind, table, flds in (("obj", objs, self.objFlds),
+		                          ("cfg", cfgs, self.cfgFlds)):
+			if not force and self._tables.get((hutch, objType, kind)) is table:
+				continue
+			self._tables[(hutch, objType, kind)] = table
+			seen = set()
+			for rowID, row in table.iteritems():
+				key = (hutch, objType, kind, rowID)
+				seen.add(key)
+				self._foldRow(key, row, flds)
+			oldKeys = self._tableKeys.get((hutch, objType, kind), set())
+			for key in oldKeys - seen:
+				self._setRow(key, None, set())
+			self._tableKeys[(hutch, objType, kind)] = seen
+
+	def updateRows(self, hutch, objType, kind, table, rowIDs):
+		"""
+		Folds only the inputted rows of the obj or cfg table into the index,
+		dropping the ones that are no longer in the table. Used when the rows
+		that changed since the last update are known.
+		"""
+		flds = self.objFlds if kind == "obj" else self.cfgFlds
+		self._tables[(hutch, objType, kind)] = table
+		keys = self._tableKeys.setdefault((hutch, objType, kind), set())
+		for rowID in rowIDs:
+			key = (hutch, objType, kind, rowID)
+			if rowID in table:
+				keys.add(key)
+				self._foldRow(key, table[rowID], flds)
+			elif key in keys:
+				keys.discard(key)
+				self._setRow(key, None, set())
+
+	def _foldRow(self, key, row, flds):
+		"""Retokenizes the row if its indexed values changed."""
+		signature = tuple(row.get(fld) for fld in flds)
+		old = self._rows.get(key)
+		if old is not None and old[0] == signature:
+			return
+		tokens = set()
+		for val in signature:
+			if val is not None:
+				tokens |= tokenize(val)
+		self._setRow(key, signature, tokens)
+
+	def _setRow(self, key, signature, tokens):
+		"""Replaces the tokens of the row, dropping it if signature is None."""
+		oldTokens = self._rows.pop(key, (None, set()))[1]
+		for token in oldTokens - tokens:
+			keys = self._postings[token]
+			keys.discard(key)
+			if not keys:
+				self._removeToken(token)
+		for token in tokens - oldTokens:
+			if token not in self._postings:
+				self._addToken(token)
+			self._postings[token].add(key)
+		if signature is not None:
+			self._rows[key] = (signature, tokens)
+
+	def _addToken(self, token):
+		self._postings[token] = set()
+		insort(self._tokens, token)
+		for gram in nGrams(token, self.n):
+			self._grams.setdefault(gram, set()).add(token)
+
+	def _removeToken(self, token):
+		del self._postings[token]
+		del self._tokens[bisect_left(self._tokens, token)]
+		for gram in nGrams(token, self.n):
+			tokens = self._grams[gram]
+			tokens.discard(token)
+			if not tokens:
+				del self._grams[gram]
+
+	def search(self, query, mode="exact", minScore=0.3):
+		"""
+		Returns a dictionary of row key to score for the query. Exact and
+		prefix matches score 1. Fuzzy matches score by the n-gram overlap
+		(Jaccard) between the query and the best matching token.
+		"""
+		query = str(query).strip().lower()
+		if mode == "exact":
+			return dict.fromkeys(self._postings.get(query, ()), 1.0)
+		elif mode == "prefix":
+			matches = {}
+			for i in xrange(bisect_left(self._tokens, query), len(self._tokens)):
+				token = self._tokens[i]
+				if not token.startswith(query):
+					break
+				matches.update(dict.fromkeys(self._postings[token], 1.0))
+			return matches
+		elif mode == "fuzzy":
+			queryGrams = nGrams(query, self.n)
+			overlaps   = {}
+			for gram in queryGrams:
+				for token in self._grams.get(gram, ()):
+					overlaps[token] = overlaps.get(token, 0) + 1
+			matches = {}
+			for token, overlap in overlaps.iteritems():
+				score = float(overlap) / (len(queryGrams) +
+				                          len(nGrams(token, self.n)) - overlap)
+				if score < minScore:
+					continue
+				for key in self._postings[token]:
+					if score > matches.get(key, 0):
+						matches[key] = score
+			return matches
+		raise ValueError("Invalid search mode: '{0}'. Mode must be 'exact', \
+'prefix' or 'fuzzy'".format(mode))
+
+	def __len__(self):
+		return len(self._rows)
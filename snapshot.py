@@ -0,0 +1,208 @@
+"""
+Columnar snapshots of live device fields.
+
+A snapshot holds the live field values of many devices of one objType with one
+column per field. Float and int fields (from the field map type) are stored as
+float64 and int64 columns, enum fields as int16 indexes into the enum and the
+rest as fixed width strings. The columns are written one after the other
+behind a small header, so a snapshot is loaded as numpy memmaps without reading
+or copying any of the data, and two snapshots are compared a column at a time.
+"""
+import os
+import time
+import struct
+import numpy as np
+from ast import literal_eval
+from tempfile import mkstemp
+
+snapMagic   = "DCFGSNAP"
+snapVersion = 1
+snapAlign   = 64                      #Byte alignment of each column
+noConStr    = "NO CON"
+intNull     = np.iinfo(np.int64).min  #Missing value of int columns
+enumNull    = -1                      #Missing value of enum columns
+
+def columnDtype(fldType, enum):
+	"""Returns the numpy dtype of a numeric column, None for string columns."""
+	if enum:
+		return np.dtype('<i2')
+	elif fldType == "<type 'float'>":
+		return np.dtype('<f8')
+	elif fldType == "<type 'int'>":
+		return np.dtype('<i8')
+	return None
+
+def encodeColumn(vals, fldType, enum):
+	"""
+	Returns the column array of the inputted field values (strings as read by
+	devconfig). Values that are missing or cannot be converted are stored as
+	the column's null value.
+	"""
+	dtype = columnDtype(fldType, enum)
+	if dtype is None:
+		return strColumn(vals)
+	if enum:
+		enum = list(enum)
+		def encode(val):
+			try:
+				return enum.index(val)
+			except ValueError:
+				return enumNull
+	elif dtype.kind == 'f':
+		def encode(val):
+			try:
+				return float(val)
+			except (TypeError, ValueError):
+				return np.nan
+	else:
+		def encode(val):
+			try:
+				return int(val)
+			except (TypeError, ValueError):
+				return intNull
+	return np.array([encode(val) for val in vals], dtype=dtype)
+
+def strColumn(vals):
+	"""Returns a fixed width string column of the inputted values."""
+	vals = [str(val) for val in vals]
+	return np.array(vals, dtype='S{0}'.format(max([1] + map(len, vals))))
+
+def writeSnapshot(snapPath, objType, Pvs, hutches, fldDicts, fldSpecs):
+	"""
+	Writes the field dicts of the devices to a snapshot file. fldSpecs is a
+	list of (field, type, enum) tuples from the field map. The file is
+	replaced atomically.
+	"""
+	columns = [("_Pv", strColumn(Pvs), None),
+	           ("_hutch", strColumn(hutches), None)]
+	for fld, fldType, enum in fldSpecs:
+		columns.append((fld, encodeColumn([fldDict.get(fld) for fldDict in
+		                                   fldDicts], fldType, enum),
+		                list(enum) if enum else None))
+	header  = {"version" : snapVersion,
+	           "objType" : objType,
+	           "time"    : time.time(),
+	           "length"  : len(Pvs),
+	           "columns" : []}
+	# Column offsets are relative to the aligned end of the header
+	offset = 0
+	for name, column, enum in columns:
+		header["columns"].append((name, column.dtype.str, offset, enum))
+		offset = alignUp(offset + column.nbytes)
+	headerStr = repr(header)
+	dataStart = alignUp(len(snapMagic) + 8 + len(headerStr))
+	snapDir   = os.path.dirname(os.path.abspath(snapPath))
+	fd, tmpPath = mkstemp(dir=snapDir)
+	try:
+		with os.fdopen(fd, 'wb') as snapFile:
+			snapFile.write(snapMagic + struct.pack('<Q', len(headerStr)))
+			snapFile.write(headerStr)
+			for (_, column, _), (_, _, offset, _) in zip(columns, 
+			                                             header["columns"]):
+				snapFile.seek(dataStart + offset)
+				snapFile.write(column.tostring())
+		os.rename(tmpPath, snapPath)
+	except Exception:
+		os.remove(tmpPath)
+		raise
+	return snapPath
+
+def alignUp(offset):
+	"""Returns the offset rounded up to the column alignment."""
+	return (offset + snapAlign - 1) // snapAlign * snapAlign
+
+class snapshot(object):
+	"""
+	Snapshot file loaded with one read-only memmap per column. Devices are
+	rows, addressed by position or by PV.
+	"""
+	def __init__(self, snapPath):
+		self.path = snapPath
+		with open(snapPath, 'rb') as snapFile:
+			if snapFile.read(len(snapMagic)) != snapMagic:
+				raise ValueError("{0} is not a snapshot.".format(snapPath))
+			headerLen, = struct.unpack('<Q', snapFile.read(8))
+			header = literal_eval(snapFile.read(headerLen))
+		if header["version"] != snapVersion:
+			raise ValueError("Unsupported snapshot version {0}.".format(
+				header["version"]))
+		self.objType  = header["objType"]
+		self.time     = header["time"]
+		self._columns = {}            #Dict of name:memmap
+		self._enums   = {}            #Dict of fld:enum list or None
+		self.flds     = []            #Fields in file order
+		length    = header["length"]
+		dataStart = alignUp(len(snapMagic) + 8 + headerLen)
+		for name, dtype, offset, enum in header["columns"]:
+			if length:
+				column = np.memmap(snapPath, dtype=np.dtype(dtype), mode='r',
+				                   offset=dataStart + offset, shape=(length,))
+			else:
+				column = np.empty(0, dtype=np.dtype(dtype))
+			self._columns[name] = column
+			if not name.startswith("_"):
+				self.flds.append(name)
+				self._enums[name] = enum
+		self.Pvs     = self._columns["_Pv"].tolist()
+		self.hutches = self._columns["_hutch"].tolist()
+		self._index  = {Pv:i for i, Pv in enumerate(self.Pvs)}
+
+	def __len__(self):
+		return len(self.Pvs)
+
+	def __contains__(self, Pv):
+		return Pv in self._index
+
+	def column(self, fld):
+		"""Returns the raw (memory-mapped) column of the field."""
+		return self._columns[fld]
+
+	def value(self, fld, row):
+		"""Returns the field value of the device as devconfig reads it."""
+		val = self._columns[fld][row]
+		enum = self._enums[fld]
+		if enum is not None:
+			return enum[val] if 0 <= val < len(enum) else noConStr
+		kind = self._columns[fld].dtype.kind
+		if kind == 'f':
+			return noConStr if np.isnan(val) else str(float(val))
+		elif kind == 'i':
+			return noConStr if val == intNull else str(int(val))
+		return str(val)
+
+	def fldDict(self, Pv):
+		"""Returns the field dictionary of the device with the inputted PV."""
+		row = self._index[Pv]
+		return {fld:self.value(fld, row) for fld in self.flds}
+
+def diffSnapshots(snapA, snapB, flds=None):
+	"""
+	Compares two snapshots column by column. Returns the PVs found in both, in
+	the order of snapA, and a boolean matrix of PVs by flds (every field of
+	snapA by default) that is True where the values differ. Fields missing
+	from either snapshot are marked as different.
+	"""
+	flds   = list(snapA.flds if flds is None else flds)
+	Pvs    = [Pv for Pv in snapA.Pvs if Pv in snapB._index]
+	rowsA  = np.array([snapA._index[Pv] for Pv in Pvs], dtype=np.intp)
+	rowsB  = np.array([snapB._index[Pv] for Pv in Pvs], dtype=np.intp)
+	if len(rowsA) == len(snapA) == len(snapB) and (rowsA == rowsB).all():
+		rowsA = rowsB = slice(None)       #Same devices, no reordering needed
+	mask = np.ones((len(Pvs), len(flds)), dtype=bool)
+	for j, fld in enumerate(flds):
+		if fld not in snapA._enums or fld not in snapB._enums:
+			continue
+		colA, colB = snapA.column(fld), snapB.column(fld)
+		sameType = colA.dtype == colB.dtype or colA.dtype.kind == \
+		    colB.dtype.kind == 'S'
+		if not sameType or snapA._enums[fld] != snapB._enums[fld]:
+			# The field map changed between the snapshots, compare the values
+			mask[:,j] = [snapA.value(fld, snapA._index[Pv]) != snapB.value(
+				fld, snapB._index[Pv]) for Pv in Pvs]
+			continue
+		valsA, valsB = colA[rowsA], colB[rowsB]
+		same = valsA == valsB
+		if colA.dtype.kind == 'f':
+			same |= np.isnan(valsA) & np.isnan(valsB)
+		mask[:,j] = ~same
+	return Pvs, mask
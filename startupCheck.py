@@ -0,0 +1,60 @@
+#!/usr/bin/python
+"""
+Startup budget check for devconfig.
+
+Times 'import devconfig' and 'devconfig.py --help' in fresh interpreters and
+fails (exit status 1) if their sum is over the budget, or if importing
+devconfig loads any of the pmgr, psp or pyca modules, which must only be
+imported on first use. Each command is run a few times and the fastest run
+is kept, so a busy machine does not fail the check on its own.
+
+Usage: python startupCheck.py [--budget 1.0] [--repeat 3]
+"""
+import os
+import sys
+import time
+from subprocess import call, check_output
+from optparse import OptionParser
+
+directory = os.path.dirname(os.path.abspath(__file__))
+lazyModules = ("pmgr", "psp", "pyca")
+
+def startupTime(args, repeat=1):
+	"""
+	Returns the fastest wall time of running python with args in a subprocess
+	repeat times.
+	"""
+	times = []
+	with open(os.devnull, 'w') as devnull:
+		for _ in range(repeat):
+			start = time.time()
+			call([sys.executable] + args, stdout=devnull, cwd=directory)
+			times.append(time.time() - start)
+	return min(times)
+
+def eagerModules():
+	"""Returns the lazily loaded modules that importing devconfig loads."""
+	loaded = check_output([sys.executable, '-c', 'import sys, devconfig; '
+	                       'print "\\n".join(sys.modules)'], cwd=directory)
+	return sorted(name for name in loaded.split() if
+	              name.split(".")[0] in lazyModules)
+
+def main():
+	parser = OptionParser()
+	parser.add_option('--budget', action='store', type='float', dest='budget',
+	                  default=1.0)
+	parser.add_option('--repeat', action='store', type='int', dest='repeat',
+	                  default=3)
+	options, _ = parser.parse_args()
+	importTime = startupTime(['-c', 'import devconfig'], options.repeat)
+	helpTime   = startupTime(['devconfig.py', '--help'], options.repeat)
+	passed     = importTime + helpTime <= options.budget
+	print "import {0:.3f} s + --help {1:.3f} s, budget {2:.3f} s: {3}".format(
+		importTime, helpTime, options.budget, "PASS" if passed else "FAIL")
+	eager = eagerModules()
+	if eager:
+		print "import devconfig loads {0}: FAIL".format(", ".join(eager))
+	return 0 if passed and not eager else 1
+
+if __name__ == "__main__":
+	sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+Shared fixtures of the devconfig tests. Everything runs against the fake CA
+and pmgr backends of fakeBackends, so no beamline access is needed.
+"""
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from devconfig import devconfig
+from fakeBackends import fakeCABackend, fakePmgrFactory
+
+@pytest.fixture(scope="session")
+def fldMap():
+	"""The ims_motor field map DataFrame."""
+	return devconfig(mode="local", metaCache=False)._objTypeFldMaps["ims_motor"]
+
+@pytest.fixture
+def caBackend(fldMap):
+	"""Fake CA backend returning values consistent with the fake pmgr."""
+	return fakeCABackend(fldMap=fldMap)
+
+@pytest.fixture
+def makeDcfg(fldMap, caBackend):
+	"""
+	Returns a function creating devconfigs backed by the caBackend fixture and
+	a fake pmgr of nDevices devices per hutch.
+	"""
+	def makeDcfg(nDevices=3, **kwargs):
+		kwargs.setdefault("pmgrFactory", fakePmgrFactory(fldMap, nDevices))
+		kwargs.setdefault("caBackend", caBackend)
+		return devconfig(mode="local", metaCache=False, strict=True, 
+		                 caTimeout=0.2, **kwargs)
+	return makeDcfg
+
+@pytest.fixture
+def dcfg(makeDcfg):
+	"""devconfig over 3 fake devices per hutch."""
+	return makeDcfg()
@@ -0,0 +1,77 @@
+from StringIO import StringIO
+
+Pv = "XPP:MMS:0001"
+
+def planChans(plan):
+	"""Returns the channels written by each step of the plan."""
+	return [[chan for chan, _ in step] for step in plan]
+
+def liveFlds(dcfg, **vals):
+	"""Returns a live field dict of zeros updated with vals."""
+	fldDict = {spec.fld:"0" for spec in dcfg._objTypeFldSpecs["ims_motor"]}
+	fldDict.update(vals)
+	return fldDict
+
+def test_only_differing_writable_fields_are_planned(dcfg):
+	live = liveFlds(dcfg)
+	pmgr = liveFlds(dcfg, FLD_ACCL="1.5", FLD_PN="9")
+	plan = dcfg._getApplyPlan(Pv, "ims_motor", live, pmgr)
+	chans = sum(planChans(plan), [])
+	assert Pv + ".ACCL" in chans
+	assert (Pv + ".ACCL", 1.5) in sum(plan, [])
+	# FLD_PN is readonly
+	assert Pv + ".PN" not in chans
+	assert Pv + ".BACC" not in chans
+
+def test_one_field_per_mutex_group(dcfg):
+	specs = dcfg._objTypeFldSpecs["ims_motor"]
+	first = min((specs["FLD_HLM"], specs["FLD_DHLM"]), 
+	            key=lambda spec: spec.colorder)
+	live  = liveFlds(dcfg)
+	pmgr  = liveFlds(dcfg, FLD_HLM="5", FLD_DHLM="6")
+	chans = sum(planChans(dcfg._getApplyPlan(Pv, "ims_motor", live, pmgr)), [])
+	assert [chan for chan in chans if chan in (Pv + ".HLM", Pv + ".DHLM")] \
+	    == [Pv + first.pv]
+
+def test_steps_follow_setorder(dcfg):
+	specs = dcfg._objTypeFldSpecs["ims_motor"]
+	live  = liveFlds(dcfg)
+	pmgr  = liveFlds(dcfg, FLD_ACCL="1", FLD_EL="2", FLD_UREV="3")
+	plan  = dcfg._getApplyPlan(Pv, "ims_motor", live, pmgr)
+	orders = [specs["FLD_" + chan.rsplit(".", 1)[1]].setorder for step in plan
+	          for chan, _ in step]
+	assert orders == sorted(orders)
+
+def test_setmutex_fields_are_zeroed_and_written_alone(dcfg):
+	specs = dcfg._objTypeFldSpecs["ims_motor"]
+	live  = liveFlds(dcfg, FLD_S1=specs["FLD_S1"].enum[1])
+	pmgr  = liveFlds(dcfg, FLD_S1=specs["FLD_S1"].enum[1])
+	plan  = dcfg._getApplyPlan(Pv, "ims_motor", live, pmgr)
+	# S1 is mustwrite, so it is written even though it did not change
+	steps = [step for step in plan if step[0][0] == Pv + ".S1"]
+	assert steps == [[(Pv + ".S1", 0)], [(Pv + ".S1", 1)]]
+	assert all(len(step) == 1 for step in plan if step[0][0].endswith(
+		(".S1", ".S2", ".S3", ".S4")))
+
+def test_apply_writes_the_pmgr_values(dcfg, caBackend):
+	specs = dcfg._objTypeFldSpecs["ims_motor"]
+	mustWrite = set("XPP:MMS:0002" + spec.pv for spec in specs if 
+	                spec.mustwrite)
+	pmgr = dcfg._getPmgr("ims_motor", "xpp")
+	pmgr.remoteChange("cfg", 1, {"FLD_ACCL":"2.5", "FLD_HLM":"5", 
+	                             "FLD_DHLM":"6"})
+	dcfg._pmgrPool.sync("ims_motor", "xpp")
+	records = dcfg.apply(Pv, "XPP:MMS:0002", out=StringIO())
+	assert [record["status"] for record in records] == ["Applied"] * 2
+	puts = [name for name, _ in caBackend.puts]
+	assert (Pv + ".ACCL", 2.5) in caBackend.puts
+	assert len(set([Pv + ".HLM", Pv + ".DHLM"]).intersection(puts)) == 1
+	# Nothing differs on the second device, only the mustwrite fields are sent
+	assert set(name for name in puts if name.startswith("XPP:MMS:0002")) == \
+	    mustWrite
+
+def test_apply_skips_unreachable_devices(dcfg, caBackend):
+	caBackend.disconnect(Pv)
+	records = dcfg.apply(Pv, out=StringIO())
+	assert records[0]["status"] == "Skipped"
+	assert not caBackend.puts
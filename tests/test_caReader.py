@@ -0,0 +1,65 @@
+import time
+from caReader import BatchReader, NegativeCache
+from fakeBackends import fakeCABackend, deviceSN
+
+names   = ["XPP:MMS:0001.ACCL", "XPP:MMS:0001.SN", "XPP:MMS:0002.ACCL", 
+           "XPP:MMS:0002.SN"]
+devices = {name:name.split(".")[0] for name in names}
+
+class failingBackend(fakeCABackend):
+	"""Fake backend that cannot create the channels in failNames."""
+	failNames = ("XPP:MMS:0001.ACCL",)
+
+	def create(self, name):
+		if name in self.failNames:
+			raise self.error(name)
+		return fakeCABackend.create(self, name)
+
+def test_read_returns_values():
+	values = BatchReader(fakeCABackend(), 0.2).read(names, devices=devices)
+	assert values["XPP:MMS:0001.SN"] == deviceSN("XPP:MMS:0001")
+	assert values["XPP:MMS:0002.ACCL"] == 0
+
+def test_timeout_is_shared_by_all_channels():
+	reader = BatchReader(fakeCABackend(latency=1.0), 0.1)
+	start  = time.time()
+	values = reader.read(names)
+	assert time.time() - start < 0.5
+	assert values == dict.fromkeys(names, None)
+
+def test_failed_device_only_polls_its_other_channels():
+	backend = fakeCABackend()
+	backend.disconnect("XPP:MMS:0001")
+	start  = time.time()
+	values = BatchReader(backend, 0.2).read(names, devices=devices)
+	assert time.time() - start < 0.35
+	assert values["XPP:MMS:0001.ACCL"] is values["XPP:MMS:0001.SN"] is None
+	assert values["XPP:MMS:0002.SN"] == deviceSN("XPP:MMS:0002")
+
+def test_failure_does_not_zero_other_devices_without_negcache():
+	backend = failingBackend(latency=0.05)
+	values  = BatchReader(backend, 0.2, None).read(names, devices=devices)
+	assert values["XPP:MMS:0001.ACCL"] is None
+	assert values["XPP:MMS:0002.ACCL"] == 0
+	assert values["XPP:MMS:0002.SN"] == deviceSN("XPP:MMS:0002")
+
+def test_dead_devices_are_skipped():
+	backend  = fakeCABackend()
+	negCache = NegativeCache(30.0)
+	reader   = BatchReader(backend, 0.1, negCache)
+	backend.disconnect("XPP:MMS:0001")
+	reader.read(names, devices=devices)
+	assert negCache.isDead("XPP:MMS:0001")
+	assert not negCache.isDead("XPP:MMS:0002")
+	creates = backend.creates
+	values  = reader.read(names, devices=devices)
+	assert backend.creates - creates == 2
+	assert negCache.skipped == 2
+	assert values["XPP:MMS:0001.SN"] is None
+
+def test_answering_device_is_marked_alive():
+	backend  = failingBackend()
+	negCache = NegativeCache(30.0)
+	BatchReader(backend, 0.1, negCache).read(names, devices=devices)
+	# One channel of the device answered, so it is still reachable
+	assert not negCache.isDead("XPP:MMS:0001")
@@ -0,0 +1,29 @@
+import pytest
+from StringIO import StringIO
+from fakeBackends import fakePmgrFactory
+
+@pytest.mark.parametrize("kwargs", [{}, {"tooltip":True, "offSet":3}, 
+                                    {"minColLen":20, "batchSize":7}])
+def test_sharded_output_matches_serial(makeDcfg, fldMap, kwargs):
+	outs = []
+	for processes in (1, 2):
+		dcfg = makeDcfg(pmgrFactory=fakePmgrFactory(fldMap, 25, diffRate=0.1))
+		out  = StringIO()
+		dcfg.Diff(hutches=["xpp", "xcs"], all=True, processes=processes, 
+		          out=out, **kwargs)
+		outs.append(out.getvalue())
+	assert outs[0] == outs[1]
+	assert outs[0].count("Motor PV: ") == 50
+	assert "Motor PV: XCS:MMS:0025" in outs[0]
+
+def test_diff_all_finds_pmgr_diffs(makeDcfg, fldMap):
+	dcfg = makeDcfg(pmgrFactory=fakePmgrFactory(fldMap, 5))
+	pmgr = dcfg._getPmgr("ims_motor", "xpp")
+	pmgr.remoteChange("cfg", 4, {"FLD_ACCL":"1.5"})
+	dcfg._pmgrPool.sync("ims_motor", "xpp")
+	out = StringIO()
+	dcfg.Diff(hutches=["xpp"], all=True, out=out)
+	diffs = [line for line in out.getvalue().splitlines() if 
+	         line.startswith("Number of Diffs")]
+	assert diffs == ["Number of Diffs: 0"] * 3 + ["Number of Diffs: 1", 
+	                                              "Number of Diffs: 0"]
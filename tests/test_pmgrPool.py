@@ -0,0 +1,70 @@
+import pytest
+from pmgrPool import pmgrPool, mergeRows
+from fakeBackends import fakePmgrFactory
+
+@pytest.fixture
+def pool(fldMap):
+	return pmgrPool(fakePmgrFactory(fldMap, 3), maxAge=None)
+
+def test_handles_are_reused(pool):
+	pmgr = pool.get("ims_motor", "xpp")
+	assert pool.get("ims_motor", "xpp") is pmgr
+	assert pool.get("ims_motor", "xcs") is not pmgr
+	assert pool.stats()["fullLoads"] == 2
+
+def test_sync_merges_only_changed_rows(pool):
+	pmgr    = pool.get("ims_motor", "xpp")
+	version = pool.version("ims_motor", "xpp")
+	pmgr.remoteChange("cfg", 2, {"FLD_ACCL":"5.0"})
+	pool.sync("ims_motor", "xpp")
+	assert pmgr.cfgs[2]["FLD_ACCL"] == "5.0"
+	assert pool.changes("ims_motor", "xpp", version) == {"obj":set(), 
+	                                                     "cfg":set([2])}
+	assert pool.stats()["syncs"] == 1
+	assert pmgr.updates == 1
+
+def test_sync_swaps_tables_instead_of_changing_them(pool):
+	pmgr    = pool.get("ims_motor", "xpp")
+	oldCfgs = pmgr.cfgs
+	oldRow  = dict(oldCfgs[2])
+	pmgr.remoteChange("cfg", 2, {"FLD_ACCL":"5.0"})
+	pool.sync("ims_motor", "xpp")
+	assert pmgr.cfgs is not oldCfgs
+	assert oldCfgs[2] == oldRow
+
+def test_full_reload_reports_changes(fldMap):
+	pool = pmgrPool(fakePmgrFactory(fldMap, 3, incremental=False), maxAge=None)
+	pmgr    = pool.get("ims_motor", "xpp")
+	version = pool.version("ims_motor", "xpp")
+	pmgr.remoteChange("obj", 1, {"FLD_DESC":"moved"})
+	pool.sync("ims_motor", "xpp")
+	assert pmgr.objs[1]["FLD_DESC"] == "moved"
+	assert pool.changes("ims_motor", "xpp", version) == {"obj":set([1]), 
+	                                                     "cfg":set()}
+
+def test_changes_unknown_past_the_log(pool):
+	pool.maxLog = 2
+	pmgr    = pool.get("ims_motor", "xpp")
+	version = pool.version("ims_motor", "xpp")
+	for i in range(3):
+		pmgr.remoteChange("cfg", 1, {"FLD_ACCL":str(i)})
+		pool.sync("ims_motor", "xpp")
+	assert pool.changes("ims_motor", "xpp", version) is None
+	assert pool.changes("ims_motor", "xpp", None) is None
+	assert pool.changes("ims_motor", "xcs", version) is None
+
+def test_invalidate_recreates_handles(pool):
+	pmgr = pool.get("ims_motor", "xpp")
+	pool.invalidate(hutch="xpp")
+	assert ("ims_motor", "xpp") not in pool
+	assert pool.get("ims_motor", "xpp") is not pmgr
+
+def test_merge_rows_copies_on_change():
+	table = {1:{"id":1, "name":"a"}, 2:{"id":2, "name":"b"}}
+	same, changed = mergeRows(table, [{"id":1, "name":"a"}])
+	assert same is table and not changed
+	merged, changed = mergeRows(table, [{"id":2, "name":"c"}, 
+	                                    {"id":3, "name":"d"}])
+	assert changed == set([2, 3])
+	assert merged[2]["name"] == "c" and 3 in merged
+	assert table[2]["name"] == "b" and 3 not in table
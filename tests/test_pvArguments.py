@@ -0,0 +1,42 @@
+from devconfig import parsePvArguments
+
+def test_full_pvs_and_ranges():
+	assert parsePvArguments(["XPP:MMS:01-03"]) == ["XPP:MMS:01", "XPP:MMS:02",
+	                                               "XPP:MMS:03"]
+	assert parsePvArguments(["XPP:MMS:0009-0010"]) == ["XPP:MMS:0009", 
+	                                                   "XPP:MMS:0010"]
+	assert parsePvArguments(["XPP:MMS:01-03:SUB"]) == ["XPP:MMS:01-03:SUB"]
+
+def test_shorthand_follows_the_last_pv():
+	assert parsePvArguments(["XPP:MMS:0001", "5", "7-8", "XCS:MMS:01", "2"]) \
+	    == ["XPP:MMS:0001", "XPP:MMS:0005", "XPP:MMS:0007", "XPP:MMS:0008",
+	        "XCS:MMS:01", "XCS:MMS:02"]
+
+def test_invalid_arguments_are_dropped():
+	assert parsePvArguments(["05"]) == []
+	assert parsePvArguments(["XPP:MMS:05-03"]) == []
+	assert parsePvArguments([]) is None
+
+def test_brace_expansion():
+	assert parsePvArguments(["XPP:MMS:{01,05,10..12}"]) == [
+		"XPP:MMS:01", "XPP:MMS:05", "XPP:MMS:10", "XPP:MMS:11", "XPP:MMS:12"]
+	assert parsePvArguments(["XPP:{MMS,CLZ}:{1..2}"]) == [
+		"XPP:MMS:1", "XPP:MMS:2", "XPP:CLZ:1", "XPP:CLZ:2"]
+
+def test_globs_match_known_pvs():
+	known = ["XPP:MMS:01", "XPP:MMS:02", "XPP:MMS:11"]
+	assert parsePvArguments(["XPP:MMS:0*"], lambda pattern: known) == [
+		"XPP:MMS:01", "XPP:MMS:02"]
+	assert parsePvArguments(["XPP:MMS:?1"], lambda pattern: known) == [
+		"XPP:MMS:01", "XPP:MMS:11"]
+
+def test_argument_files(tmpdir):
+	argFile = tmpdir.join("pvs.txt")
+	argFile.write("XPP:MMS:01 03  # the first ones\n\n05-06\n")
+	assert parsePvArguments(["@" + str(argFile), "XCS:MMS:08"]) == [
+		"XPP:MMS:01", "XPP:MMS:03", "XPP:MMS:05", "XPP:MMS:06", "XCS:MMS:08"]
+
+def test_numbers_are_ids_unless_as_wide_as_the_pv(dcfg):
+	assert dcfg._inferFromArgs(["XPP:MMS:0001", "0002", "02", "1234567"]) == (
+		["XPP:MMS:0001", "XPP:MMS:0002"], ["02", "1234567"])
+	assert dcfg._inferFromArgs(["1", "12"]) == ([], ["1"])
@@ -0,0 +1,52 @@
+from StringIO import StringIO
+
+def save(dcfg, *Pvs):
+	"""Saves the devices and returns their statuses."""
+	return [record["status"] for record in dcfg.save(*Pvs, out=StringIO())]
+
+def shareCfg(dcfg, objID, cfgID):
+	"""Points the xpp pmgr obj at another cfg."""
+	pmgr = dcfg._getPmgr("ims_motor", "xpp")
+	pmgr.remoteChange("obj", objID, {"config":cfgID})
+	dcfg._pmgrPool.sync("ims_motor", "xpp")
+	return pmgr
+
+def test_save_changed_fields(dcfg, caBackend):
+	caBackend.values["XPP:MMS:0001.ACCL"] = 2.5
+	assert save(dcfg, "XPP:MMS:0001", "XPP:MMS:0002") == ["Saved", 
+	                                                      "No changes"]
+	pmgr = dcfg._getPmgr("ims_motor", "xpp")
+	assert pmgr.cfgs[1]["FLD_ACCL"] == 2.5
+	assert pmgr.commits == 1
+
+def test_save_converts_to_field_types(dcfg, caBackend):
+	specs = dcfg._objTypeFldSpecs["ims_motor"]
+	caBackend.values["XPP:MMS:0001.DIR"] = 1
+	caBackend.values["XPP:MMS:0001.FREV"] = 200.0
+	save(dcfg, "XPP:MMS:0001")
+	cfg = dcfg._getPmgr("ims_motor", "xpp").cfgs[1]
+	assert cfg["FLD_DIR"] == specs["FLD_DIR"].enum[1]
+	assert cfg["FLD_FREV"] == 200 and isinstance(cfg["FLD_FREV"], int)
+
+def test_readonly_fields_are_not_saved(dcfg, caBackend):
+	caBackend.values["XPP:MMS:0001.PN"] = "changed"
+	assert save(dcfg, "XPP:MMS:0001") == ["No changes"]
+	assert dcfg._getPmgr("ims_motor", "xpp").commits == 0
+
+def test_shared_cfg_saved_once(dcfg, caBackend):
+	pmgr = shareCfg(dcfg, 2, 1)
+	for Pv in ("XPP:MMS:0001", "XPP:MMS:0002"):
+		caBackend.values[Pv + ".ACCL"] = 2.5
+	assert save(dcfg, "XPP:MMS:0001", "XPP:MMS:0002") == ["Saved", "Saved"]
+	assert pmgr.cfgs[1]["FLD_ACCL"] == 2.5
+	assert pmgr.commits == 1
+
+def test_shared_cfg_conflict_is_not_saved(dcfg, caBackend):
+	pmgr = shareCfg(dcfg, 2, 1)
+	caBackend.values["XPP:MMS:0001.ACCL"] = 2.5
+	caBackend.values["XPP:MMS:0002.ACCL"] = 3.5
+	caBackend.values["XPP:MMS:0003.ACCL"] = 4.5
+	assert save(dcfg, "XPP:MMS:0001-0003") == ["Cfg conflict", "Cfg conflict",
+	                                           "Saved"]
+	assert pmgr.cfgs[1]["FLD_ACCL"] == "0.0"
+	assert pmgr.cfgs[3]["FLD_ACCL"] == 4.5
@@ -0,0 +1,85 @@
+import pytest
+from searchIndex import pmgrSearchIndex, tokenize
+
+def makeTables():
+	objs = {1:{"name":"XPP:MMS:01", "FLD_SN":"1234"},
+	        2:{"name":"XPP:MMS:02", "FLD_SN":"5678"},
+	        3:{"name":"Sample Stage X", "FLD_SN":"9012"}}
+	cfgs = {1:{"name":"default cfg"}}
+	return objs, cfgs
+
+@pytest.fixture
+def index():
+	index = pmgrSearchIndex(("name", "FLD_SN"))
+	index.update("xpp", "ims_motor", *makeTables())
+	return index
+
+def test_tokenize_splits_words_and_pv_parts():
+	assert tokenize("XPP:MMS:01 stage") == set(["xpp:mms:01 stage", 
+	                                            "xpp:mms:01", "xpp", "mms", 
+	                                            "01", "stage"])
+
+def test_exact(index):
+	assert index.search("XPP:MMS:01") == {("xpp", "ims_motor", "obj", 1):1.0}
+	assert index.search("5678") == {("xpp", "ims_motor", "obj", 2):1.0}
+	assert index.search("default") == {("xpp", "ims_motor", "cfg", 1):1.0}
+	assert index.search("xpp:mms") == {}
+
+def test_prefix(index):
+	assert set(index.search("xpp:mms:0", "prefix")) == set([
+		("xpp", "ims_motor", "obj", 1), ("xpp", "ims_motor", "obj", 2)])
+	assert set(index.search("sam", "prefix")) == set([
+		("xpp", "ims_motor", "obj", 3)])
+
+def test_fuzzy_ranks_by_overlap(index):
+	matches = index.search("stgae", "fuzzy", minScore=0.1)
+	assert ("xpp", "ims_motor", "obj", 3) in matches
+	assert 0 < matches[("xpp", "ims_motor", "obj", 3)] < 1
+	assert index.search("stage", "fuzzy")[("xpp", "ims_motor", "obj", 3)] == 1
+
+def test_invalid_mode(index):
+	with pytest.raises(ValueError):
+		index.search("xpp", "regex")
+
+def test_update_folds_in_changed_rows(index):
+	objs, cfgs = makeTables()
+	objs[1] = {"name":"XCS:MMS:01", "FLD_SN":"1234"}
+	del objs[2]
+	index.update("xpp", "ims_motor", objs, cfgs)
+	assert index.search("xcs:mms:01") == {("xpp", "ims_motor", "obj", 1):1.0}
+	assert index.search("xpp:mms:01") == {}
+	assert index.search("5678") == {}
+	assert len(index) == 3
+
+def test_update_skips_the_same_tables_unless_forced():
+	index = pmgrSearchIndex(("name",))
+	objs, cfgs = makeTables()
+	index.update("xpp", "ims_motor", objs, cfgs)
+	objs[1]["name"] = "renamed"
+	index.update("xpp", "ims_motor", objs, cfgs)
+	assert index.search("renamed") == {}
+	index.update("xpp", "ims_motor", objs, cfgs, force=True)
+	assert index.search("renamed") == {("xpp", "ims_motor", "obj", 1):1.0}
+
+def test_update_rows(index):
+	objs, _ = makeTables()
+	objs[2] = {"name":"XPP:MMS:22", "FLD_SN":"5678"}
+	del objs[3]
+	index.updateRows("xpp", "ims_motor", "obj", objs, [2, 3])
+	assert index.search("xpp:mms:22") == {("xpp", "ims_motor", "obj", 2):1.0}
+	assert index.search("stage") == {}
+	# Rows that were not listed are left as they were
+	assert index.search("1234") == {("xpp", "ims_motor", "obj", 1):1.0}
+
+def objMatches(dcfg, *args, **kwargs):
+	"""Returns the (hutch, id) of the pmgr objs the search matches."""
+	return [(match["hutch"], match["id"]) for match in dcfg._search(
+		*args, **kwargs) if match["kind"] == "obj"]
+
+def test_search_follows_pmgr_changes(dcfg):
+	assert objMatches(dcfg, "XPP:MMS:0002") == [("xpp", 2)]
+	pmgr = dcfg._getPmgr("ims_motor", "xpp")
+	pmgr.remoteChange("obj", 2, {"name":"XPP:MMS:0042"})
+	dcfg._pmgrPool.sync("ims_motor", "xpp")
+	assert objMatches(dcfg, "XPP:MMS:0002") == []
+	assert objMatches(dcfg, "xpp:mms:004", match="prefix") == [("xpp", 2)]
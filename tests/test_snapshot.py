@@ -0,0 +1,59 @@
+import numpy as np
+from StringIO import StringIO
+from snapshot import snapshot, writeSnapshot, diffSnapshots
+
+Pvs = ["XPP:MMS:0001", "XPP:MMS:0002", "XPP:MMS:0003"]
+
+def test_round_trip(tmpdir):
+	specs = [("FLD_ACCL", "<type 'float'>", None), 
+	         ("FLD_FREV", "<type 'int'>", None),
+	         ("FLD_DIR", "<type 'str'>", ("Pos", "Neg")),
+	         ("FLD_DESC", "<type 'str'>", None)]
+	flds  = [{"FLD_ACCL":"0.5", "FLD_FREV":"200", "FLD_DIR":"Neg", 
+	          "FLD_DESC":"a stage"},
+	         {"FLD_ACCL":"NO CON", "FLD_FREV":"NO CON", "FLD_DIR":"NO CON",
+	          "FLD_DESC":"NO CON"}]
+	snapPath = str(tmpdir.join("round.snap"))
+	writeSnapshot(snapPath, "ims_motor", Pvs[:2], ["xpp"] * 2, flds, specs)
+	snap = snapshot(snapPath)
+	assert snap.objType == "ims_motor" and snap.Pvs == Pvs[:2]
+	assert snap.hutches == ["xpp", "xpp"]
+	assert snap.fldDict(Pvs[0]) == flds[0]
+	assert snap.fldDict(Pvs[1]) == flds[1]
+	assert snap.column("FLD_DIR").dtype == np.dtype("<i2")
+
+def test_snapshot_of_live_devices(dcfg, tmpdir):
+	snapPath = dcfg.snapshot("XPP:MMS:0001-0003", 
+	                         path=str(tmpdir.join("live.snap")))
+	snap = snapshot(snapPath)
+	live = dcfg._getLiveFldDicts(Pvs, ["ims_motor"] * 3)
+	assert snap.Pvs == Pvs
+	for Pv, liveFld in zip(Pvs, live):
+		assert snap.fldDict(Pv) == {fld:str(val) for fld, val in 
+		                            liveFld.items()}
+
+def test_snapshot_diff(dcfg, caBackend, tmpdir):
+	before = dcfg.snapshot(*Pvs, path=str(tmpdir.join("before.snap")))
+	caBackend.values["XPP:MMS:0002.ACCL"] = 1.5
+	dcfg._negCache.clear()
+	after = dcfg.snapshot(*Pvs, path=str(tmpdir.join("after.snap")))
+	snapPvs, diffMask = diffSnapshots(snapshot(before), snapshot(after))
+	assert snapPvs == Pvs
+	assert diffMask.sum() == 1 and diffMask[1].any()
+	out = StringIO()
+	dcfg.diffSnapshot(before, after, out=out)
+	lines = out.getvalue().splitlines()
+	assert lines[0] == "1 of 3 device(s) differ."
+	assert "Motor PV: XPP:MMS:0002" in lines
+	assert [line.split() for line in lines if line.startswith(" ACCL")] == [
+		["ACCL", "0.0", "1.5"]]
+
+def test_snapshot_against_pmgr(dcfg, caBackend, tmpdir):
+	caBackend.values["XPP:MMS:0001.ACCL"] = 1.5
+	snapPath = dcfg.snapshot(*Pvs, path=str(tmpdir.join("pmgr.snap")))
+	out = StringIO()
+	dcfg.diffSnapshot(snapPath, out=out)
+	diffs = [line for line in out.getvalue().splitlines() if 
+	         line.startswith("Number of Diffs")]
+	assert diffs == ["Number of Diffs: 1", "Number of Diffs: 0", 
+	                 "Number of Diffs: 0"]